@@ -0,0 +1,197 @@
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+"""
+In-process load driver for the auth API.
+
+Runs main.app through httpx's ASGI transport (no network, no server process),
+seeds a configurable number of users straight into the database and drives a
+weighted login/refresh/register/logout mix from concurrent virtual clients.
+
+    python -m bench.load --users 100000 --requests 5000 --concurrency 64 \
+        --mix login=30,refresh=50,register=5,logout=15 --output load.json
+"""
+
+PASSWORD = "Benchmark!!2024"
+OPERATIONS = ("login", "refresh", "register", "logout")
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name}', expected one of {OPERATIONS}")
+        mix[name] = int(weight)
+    return mix
+
+
+def seed_users(database_url: str, count: int, batch_size: int = 10000) -> int:
+    """
+    Insert bench0..bench<count-1> directly, sharing one precomputed password hash.
+    """
+    from sqlalchemy import create_engine, func, insert, select
+    from core.database import Base, sync_database_url
+    from core.security import hash_password
+    from models import User
+
+    engine = create_engine(sync_database_url(database_url))
+    Base.metadata.create_all(bind=engine)
+
+    with engine.connect() as conn:
+        existing = conn.execute(select(func.count()).select_from(User).where(User.username.like("bench%"))).scalar_one()
+
+    hashed = hash_password(PASSWORD)
+    for start in range(existing, count, batch_size):
+        rows = [
+            {
+                "username": f"bench{i}",
+                "email": f"bench{i}@example.com",
+                "first_name": "Bench",
+                "last_name": "User",
+                "phone_num": "5550000000",
+                "hashed_pw": hashed,
+            }
+            for i in range(start, min(start + batch_size, count))
+        ]
+        with engine.begin() as conn:
+            conn.execute(insert(User), rows)
+
+    engine.dispose()
+    return max(count - existing, 0)
+
+
+class VirtualClient:
+    """
+    One browser-like client with its own cookie jar.
+    """
+    _registrations = itertools.count()
+
+    def __init__(self, client, users: int) -> None:
+        self.client = client
+        self.users = users
+        self.logged_in = False
+
+    async def login(self):
+        identifier = f"bench{random.randrange(self.users)}"
+        response = await self.client.post("/api/v1/auth/login", json={"identifier": identifier, "password": PASSWORD})
+        self.logged_in = response.status_code == 200
+        return response
+
+    async def refresh(self):
+        return await self.client.post("/api/v1/auth/refresh")
+
+    async def register(self):
+        n = next(self._registrations)
+        return await self.client.post("/api/v1/auth/register", json={
+            "username": f"load{os.getpid()}_{n}",
+            "password": PASSWORD,
+            "first_name": "Load",
+            "last_name": "Test",
+            "email": f"load{os.getpid()}_{n}@example.com",
+            "phone_num": "5550000000",
+        })
+
+    async def logout(self):
+        response = await self.client.post("/api/v1/auth/logout")
+        self.logged_in = False
+        return response
+
+
+async def drive(app, users: int, requests: int, concurrency: int, mix: Dict[str, int]):
+    import httpx
+
+    samples: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    remaining = itertools.count(requests, -1)
+    names, weights = zip(*mix.items())
+
+    async def worker():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            vc = VirtualClient(client, users)
+            while next(remaining) > 0:
+                op = random.choices(names, weights)[0]
+                # Refresh and logout need a session; log in first like a browser would
+                if op in ("refresh", "logout") and not vc.logged_in:
+                    op = "login"
+
+                t0 = time.perf_counter()
+                response = await getattr(vc, op)()
+                samples[op].append(time.perf_counter() - t0)
+                if response.status_code != 200:
+                    errors[op] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, errors, time.perf_counter() - started
+
+
+async def run(args) -> Dict[str, Dict]:
+    from bench.report import summarize
+    from main import app
+
+    # Run startup/shutdown exactly as the server would
+    async with app.router.lifespan_context(app):
+        samples, errors, elapsed = await drive(app, args.users, args.requests, args.concurrency, args.mix)
+
+    results = {op: summarize(samples[op], elapsed, errors[op]) for op in OPERATIONS if samples[op]}
+    every = [s for op in samples for s in samples[op]]
+    results["total"] = summarize(every, elapsed, sum(errors.values()))
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="In-process load test of the auth endpoints")
+    parser.add_argument("--users", type=int, default=1000, help="Users to seed (1k to 1M)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("login=30,refresh=50,register=5,logout=15"))
+    parser.add_argument("--database-url", help="Defaults to a fresh SQLite file in a temp directory")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", type=Path, default=Path("bench-load.json"))
+    parser.add_argument("--compare", type=Path, help="Earlier result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    # The app reads DATABASE_URL at import time, so set it before importing anything
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp(prefix='authlogin-bench-')}/bench.db"
+    os.environ["DATABASE_URL"] = database_url
+    # Every virtual client shares one address; measure the endpoints, not the login throttle
+    os.environ.setdefault("LOGIN_RATE_LIMIT_IP", "0")
+    os.environ.setdefault("LOGIN_RATE_LIMIT_IDENTIFIER", "0")
+    random.seed(args.seed)
+
+    from bench.report import compare, print_table, write_results
+
+    t0 = time.perf_counter()
+    seeded = seed_users(database_url, args.users)
+    print(f"Seeded {seeded} users in {time.perf_counter() - t0:.1f}s ({database_url})", file=sys.stderr)
+
+    results = asyncio.run(run(args))
+    config = {
+        "users": args.users,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "mix": args.mix,
+        "database": database_url.split("://")[0],
+    }
+    document = write_results(args.output, "load", config, results)
+    print_table(results)
+
+    if args.compare and not compare(document, args.compare, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
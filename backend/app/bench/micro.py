@@ -0,0 +1,77 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Any
+from bench.report import compare, print_table, summarize, write_results
+from core.security import hash_password, verify_password
+from core.token_cache import token_cache
+from schemas.user import password_policy_errors
+from services.auth_service import AuthService
+
+"""
+Micro-benchmarks for the security primitives on the auth hot paths.
+
+    python -m bench.micro --output micro.json [--compare baseline.json]
+"""
+
+PASSWORD = "Benchmark!!2024"
+CLAIMS = {"sub": "1", "email": "bench@example.com", "username": "bench", "type": "access"}
+
+
+def measure(fn: Callable[[], Any], iterations: int, warmup: int = 3) -> Dict[str, Any]:
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return summarize(samples, time.perf_counter() - started)
+
+
+def run(hash_iterations: int, token_iterations: int) -> Dict[str, Dict[str, Any]]:
+    hashed = hash_password(PASSWORD)
+    token = AuthService.generate_token(CLAIMS)
+
+    results = {
+        "hash_password": measure(lambda: hash_password(PASSWORD), hash_iterations),
+        "verify_password": measure(lambda: verify_password(PASSWORD, hashed), hash_iterations),
+        "password_policy": measure(lambda: password_policy_errors(PASSWORD), token_iterations),
+        "generate_token": measure(lambda: AuthService.generate_token(CLAIMS), token_iterations),
+        "validate_token[cached]": measure(lambda: AuthService.validate_token(token), token_iterations),
+    }
+
+    # Same call with the verified-claims cache switched off
+    capacity, token_cache.capacity = token_cache.capacity, 0
+    try:
+        results["validate_token[uncached]"] = measure(lambda: AuthService.validate_token(token), token_iterations)
+    finally:
+        token_cache.capacity = capacity
+
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmark auth security primitives")
+    parser.add_argument("--hash-iterations", type=int, default=20)
+    parser.add_argument("--token-iterations", type=int, default=20000)
+    parser.add_argument("--output", type=Path, default=Path("bench-micro.json"))
+    parser.add_argument("--compare", type=Path, help="Earlier result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    config = {"hash_iterations": args.hash_iterations, "token_iterations": args.token_iterations}
+    results = run(args.hash_iterations, args.token_iterations)
+    document = write_results(args.output, "micro", config, results)
+    print_table(results)
+
+    if args.compare and not compare(document, args.compare, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+"""
+Shared result handling for the benchmark scripts.
+
+Results are JSON documents of the form
+    {"kind": ..., "meta": {...}, "config": {...}, "results": {name: summary}}
+where every summary carries `throughput` (ops/s) and p50/p95/p99 latencies in ms,
+so two runs of the same kind can be compared for regressions.
+"""
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def summarize(samples: List[float], elapsed: float, errors: int = 0) -> Dict[str, Any]:
+    """
+    Summarize per-operation latencies (seconds) measured over `elapsed` wall seconds.
+    """
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "throughput": round(len(ordered) / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path: Path, kind: str, config: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Any]:
+    document = {
+        "kind": kind,
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git": _git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+        },
+        "config": config,
+        "results": results,
+    }
+    path.write_text(json.dumps(document, indent=2))
+    return document
+
+
+def print_table(results: Dict[str, Dict[str, Any]]) -> None:
+    print(f"{'name':<28}{'count':>8}{'errors':>8}{'ops/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, r in results.items():
+        print(
+            f"{name:<28}{r['count']:>8}{r['errors']:>8}{r['throughput']:>12.1f}"
+            f"{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}"
+        )
+
+
+def compare(current: Dict[str, Any], baseline_path: Path, tolerance: float) -> bool:
+    """
+    Print deltas against a saved run; False when throughput drops or p95 grows beyond tolerance.
+    """
+    baseline = json.loads(baseline_path.read_text())
+    if baseline.get("kind") != current["kind"]:
+        print(f"Baseline is a '{baseline.get('kind')}' run, not '{current['kind']}'")
+        return False
+
+    ok = True
+    print(f"\nCompared with {baseline_path} (git {baseline['meta'].get('git')}), tolerance {tolerance:.0%}")
+    for name, now in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before:
+            continue
+
+        tput = (now["throughput"] - before["throughput"]) / before["throughput"] if before["throughput"] else 0.0
+        p95 = (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0.0
+        regressed = tput < -tolerance or p95 > tolerance
+        ok = ok and not regressed
+        print(f"{name:<28} ops/s {tput:+7.1%}   p95 {p95:+7.1%}{'   REGRESSION' if regressed else ''}")
+    return ok
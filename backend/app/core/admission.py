@@ -0,0 +1,223 @@
+import asyncio
+from collections import deque
+from itertools import count
+from typing import Any, Deque, Dict, Tuple
+import orjson
+from core.config import settings
+
+"""
+Admission control for the auth routes.
+
+Login and registration spend most of their time in bcrypt; under a spike
+they would queue up in the hashing pool until every request times out,
+cheap refreshes and logouts included. AdmissionMiddleware sits in front of
+/api/v1/auth and lets at most ADMISSION_MAX_CONCURRENCY requests run at
+once, and at most ADMISSION_ROUTE_LIMITS[route] of one route.
+
+Requests over a limit wait in one queue of ADMISSION_QUEUE_SIZE entries. A
+freed slot goes to the waiting request of the highest priority (refresh,
+logout: 0; login, register: 1), oldest first. When the queue is full, a new
+high-priority request evicts the newest lower-priority waiter; otherwise it
+is turned away. Turned-away, evicted and timed-out requests
+(ADMISSION_QUEUE_TIMEOUT) get an immediate 503 with Retry-After, instead of
+a slow failure.
+"""
+
+# Lower is served first
+ROUTE_PRIORITIES = {
+    "refresh": 0,
+    "logout": 0,
+    "logout-all": 0,
+    "introspect": 0,
+    "login": 1,
+    "register": 1,
+}
+
+BUSY_BODY = orjson.dumps({"success": False, "error": "Server busy, please retry"})
+
+
+class _Route:
+    __slots__ = ("name", "priority", "limit", "active", "waiters", "admitted", "queued", "shed", "timed_out")
+
+    def __init__(self, name: str, priority: int, limit: int) -> None:
+        self.name = name
+        self.priority = priority
+        self.limit = limit
+        self.active = 0
+        # (arrival number, future resolved with True = admitted / False = evicted)
+        self.waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+        self.timed_out = 0
+
+    def has_room(self) -> bool:
+        return self.limit <= 0 or self.active < self.limit
+
+
+class AdmissionController:
+    def __init__(
+            self,
+            max_concurrency: int,
+            route_limits: Dict[str, int],
+            queue_size: int,
+            queue_timeout: float
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.routes = {
+            name: _Route(name, priority, route_limits.get(name, 0))
+            for name, priority in ROUTE_PRIORITIES.items()
+        }
+        self.active = 0
+        self.waiting = 0
+        self._arrivals = count()
+
+    def _has_room(self, route: _Route) -> bool:
+        return (self.max_concurrency <= 0 or self.active < self.max_concurrency) and route.has_room()
+
+    def _admit(self, route: _Route) -> None:
+        self.active += 1
+        route.active += 1
+        route.admitted += 1
+
+    async def acquire(self, name: str) -> bool:
+        """
+        Wait for a slot; False means shed (queue full, evicted or timed out).
+        """
+        route = self.routes[name]
+        # Waiters that could run are only left behind while every slot is taken,
+        # so a request finding room overtakes nobody
+        if self._has_room(route):
+            self._admit(route)
+            return True
+
+        if self.waiting >= self.queue_size and not self._evict_below(route.priority):
+            route.shed += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (next(self._arrivals), waiter)
+        route.waiters.append(entry)
+        route.queued += 1
+        self.waiting += 1
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            pass
+        except BaseException:
+            # Client went away while queued; hand back a slot granted meanwhile
+            self._leave(route, entry)
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                self.release(name)
+            raise
+
+        if waiter.done():
+            if not waiter.result():
+                route.shed += 1
+            return waiter.result()
+
+        self._leave(route, entry)
+        route.timed_out += 1
+        return False
+
+    def _leave(self, route: _Route, entry: Tuple[int, asyncio.Future]) -> None:
+        try:
+            route.waiters.remove(entry)
+        except ValueError:
+            # Already taken off the queue by _dispatch() or an eviction
+            return
+        self.waiting -= 1
+        entry[1].cancel()
+
+    def _evict_below(self, priority: int) -> bool:
+        # Newest waiter of the lowest priority below `priority` gives up its place
+        victims = [r for r in self.routes.values() if r.waiters and r.priority > priority]
+        if not victims:
+            return False
+        route = max(victims, key=lambda r: (r.priority, r.waiters[-1][0]))
+        _, waiter = route.waiters.pop()
+        self.waiting -= 1
+        waiter.set_result(False)
+        return True
+
+    def release(self, name: str) -> None:
+        route = self.routes[name]
+        self.active -= 1
+        route.active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        # Hand free slots to the highest-priority, oldest waiters whose route has room
+        while self.max_concurrency <= 0 or self.active < self.max_concurrency:
+            ready = [r for r in self.routes.values() if r.waiters and r.has_room()]
+            if not ready:
+                return
+            route = min(ready, key=lambda r: (r.priority, r.waiters[0][0]))
+            _, waiter = route.waiters.popleft()
+            self.waiting -= 1
+            self._admit(route)
+            waiter.set_result(True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "queue_size": self.queue_size,
+            "routes": {
+                route.name: {
+                    "active": route.active,
+                    "waiting": len(route.waiters),
+                    "limit": route.limit,
+                    "admitted": route.admitted,
+                    "queued": route.queued,
+                    "shed": route.shed,
+                    "timed_out": route.timed_out,
+                }
+                for route in self.routes.values()
+            },
+        }
+
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware applying the admission controller to the auth routes.
+    """
+    def __init__(self, app, prefix: str = "/api/v1/auth/") -> None:
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "") if scope["type"] == "http" else ""
+        name = path[len(self.prefix):] if path.startswith(self.prefix) else None
+        if not settings.ADMISSION_ENABLED or name not in ROUTE_PRIORITIES or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        if not await admission.acquire(name):
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", str(settings.ADMISSION_RETRY_AFTER).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": BUSY_BODY})
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.release(name)
+
+
+admission = AdmissionController(
+    max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+    route_limits=settings.ADMISSION_ROUTE_LIMITS,
+    queue_size=settings.ADMISSION_QUEUE_SIZE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT
+)
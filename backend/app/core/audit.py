@@ -0,0 +1,199 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+import orjson
+from fastapi import Request
+from sqlalchemy import insert
+from starlette.concurrency import run_in_threadpool
+from core.config import settings
+from core.database import session_scope
+from core.db_utils import AsyncDatabaseUtils
+from models import AuditEvent
+
+"""
+Audit trail of authentication events (register, login, refresh, logout).
+
+Handlers call record(), which only appends a dict to an in-process buffer.
+A background writer started from the app lifespan flushes the buffer every
+AUDIT_FLUSH_INTERVAL seconds, or as soon as AUDIT_BATCH_SIZE events are
+waiting, with one multi-row INSERT into audit_events (AUDIT_SINK=table) or
+one append to a size-rotated JSONL file (AUDIT_SINK=file). On shutdown the
+writer drains the buffer until it stays empty, events recorded while it
+writes included; anything recorded after that is counted as dropped.
+
+Requests never wait on the trail: when AUDIT_QUEUE_SIZE events are already
+buffered (e.g. the database is down) new events are dropped and counted, as
+are events in a batch that failed to write. Both counters are in /health.
+"""
+
+SINKS = ("table", "file", "off")
+DRAIN_ROUNDS = 10
+
+
+class AuditLog:
+    def __init__(
+            self,
+            sink: str,
+            queue_size: int,
+            batch_size: int,
+            flush_interval: float,
+            path: str,
+            max_bytes: int,
+            backups: int
+    ) -> None:
+        if sink not in SINKS:
+            raise ValueError(f"AUDIT_SINK must be one of {SINKS}, got {sink!r}")
+        self.sink = sink
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._buffer: List[Dict[str, Any]] = []
+        # Created by the writer, on the loop that runs it
+        self._wake: asyncio.Event | None = None
+        self._stopping = False
+        self._closed = False
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.sink != "off"
+
+    def record(
+            self,
+            event: str,
+            status: int,
+            request: Request | None = None,
+            user_id: int | None = None,
+            identifier: str | None = None
+    ) -> None:
+        """
+        Queue one event; never blocks and never raises.
+        """
+        if not self.enabled:
+            return
+        if len(self._buffer) >= self.queue_size or self._closed:
+            # Full, or the writer has already drained for shutdown: nothing would write it
+            self.dropped += 1
+            return
+
+        client = request.client if request is not None else None
+        user_agent = request.headers.get("user-agent") if request is not None else None
+        self._buffer.append({
+            "event": event,
+            "success": 200 <= status < 300,
+            "status": status,
+            "user_id": user_id,
+            "identifier": identifier[:255] if identifier else None,
+            "ip": client.host[:45] if client else None,
+            "user_agent": user_agent[:150] if user_agent else None,
+            "occurred_dt": datetime.now(timezone.utc),
+        })
+        self.recorded += 1
+        if len(self._buffer) >= self.batch_size and self._wake is not None:
+            self._wake.set()
+
+    async def flush(self) -> int:
+        """
+        Write everything buffered so far in batches of AUDIT_BATCH_SIZE.
+        """
+        # Swap the buffer out first; events recorded meanwhile go to the next flush
+        events, self._buffer = self._buffer, []
+        if self._wake is not None:
+            self._wake.clear()
+
+        for start in range(0, len(events), self.batch_size):
+            batch = events[start:start + self.batch_size]
+            try:
+                ok = await (self._write_table(batch) if self.sink == "table" else self._write_file(batch))
+            except Exception:
+                ok = False
+            if ok:
+                self.written += len(batch)
+            else:
+                # Retrying would let a failing sink grow the buffer without bound
+                self.failed += len(batch)
+        return len(events)
+
+    async def _write_table(self, batch: List[Dict[str, Any]]) -> bool:
+        async with session_scope() as db:
+            res, _ = await AsyncDatabaseUtils(db).db_execute(insert(AuditEvent).values(batch), model_name="AuditEvent")
+        return res["success"]
+
+    async def _write_file(self, batch: List[Dict[str, Any]]) -> bool:
+        lines = b"".join(orjson.dumps(event) + b"\n" for event in batch)
+        await run_in_threadpool(self._append, lines)
+        return True
+
+    def _append(self, lines: bytes) -> None:
+        with open(self.path, "ab") as f:
+            f.write(lines)
+            size = f.tell()
+
+        if self.max_bytes > 0 and size >= self.max_bytes:
+            # audit.jsonl -> audit.jsonl.1 -> ... -> audit.jsonl.<backups>, oldest dropped
+            for i in range(self.backups - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{i}"):
+                    os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+            if self.backups > 0:
+                os.replace(self.path, f"{self.path}.1")
+            else:
+                os.remove(self.path)
+
+    async def run_writer(self) -> None:
+        """
+        Background task started from the app lifespan; returns after draining the buffer once stop() is called.
+        """
+        self._wake = asyncio.Event()
+        self._stopping = self._closed = False
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._buffer:
+                await self.flush()
+        # Drain, including events recorded by requests that finish while a batch is being written;
+        # a few rounds, so a stream of late events cannot hold shutdown up
+        for _ in range(DRAIN_ROUNDS):
+            if not self._buffer:
+                break
+            await self.flush()
+            # Let requests resumed by that write record their events before checking again
+            await asyncio.sleep(0)
+        self._closed = True
+        self.dropped += len(self._buffer)
+        self._buffer = []
+        self._wake = None
+
+    def stop(self) -> None:
+        self._stopping = True
+        if self._wake is not None:
+            self._wake.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sink": self.sink,
+            "queued": len(self._buffer),
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+audit_log = AuditLog(
+    sink=settings.AUDIT_SINK,
+    queue_size=settings.AUDIT_QUEUE_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+    path=settings.AUDIT_FILE,
+    max_bytes=settings.AUDIT_FILE_MAX_BYTES,
+    backups=settings.AUDIT_FILE_BACKUPS
+)
@@ -0,0 +1,158 @@
+import hashlib
+import mmap
+import struct
+from bisect import bisect_left
+from threading import Lock
+from typing import Any, Callable, Dict
+from core.config import settings
+
+"""
+Offline breached-password check.
+
+BREACHED_PASSWORDS_FILE is a sorted file of fixed-size hash prefixes built
+by tools.build_breach_index from the public SHA-1 or NTLM dumps. It is
+memory-mapped read-only and binary-searched, so a lookup touches ~30 pages
+of a multi-gigabyte file and nothing is loaded into the heap. The pages
+live in the OS page cache, shared by every worker process.
+
+File layout (little-endian):
+    header  "ALBP", version, algorithm (1 = SHA-1, 2 = NTLM), prefix bytes, pad, record count
+    records count * prefix bytes, sorted, no duplicates
+"""
+
+MAGIC = b"ALBP"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBxQ")
+ALGORITHMS = {"sha1": 1, "ntlm": 2}
+# Digest length in bytes, the most a prefix can keep
+DIGEST_SIZES = {"sha1": 20, "ntlm": 16}
+
+
+def _md4(data: bytes) -> bytes:
+    # OpenSSL 3 dropped MD4 from hashlib; NTLM needs it for one short input per check
+    def rotl(x: int, n: int) -> int:
+        x &= 0xFFFFFFFF
+        return ((x << n) | (x >> (32 - n))) & 0xFFFFFFFF
+
+    message = data + b"\x80" + b"\x00" * ((55 - len(data)) % 64) + struct.pack("<Q", len(data) * 8)
+    h = [0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476]
+    for offset in range(0, len(message), 64):
+        x = struct.unpack("<16I", message[offset:offset + 64])
+        a, b, c, d = h
+        for i in range(16):
+            k, s = i, (3, 7, 11, 19)[i % 4]
+            a, b, c, d = d, rotl(a + ((b & c) | (~b & d)) + x[k], s), b, c
+        for i in range(16):
+            k, s = (i % 4) * 4 + i // 4, (3, 5, 9, 13)[i % 4]
+            a, b, c, d = d, rotl(a + ((b & c) | (b & d) | (c & d)) + x[k] + 0x5A827999, s), b, c
+        for i in range(16):
+            k, s = (0, 8, 4, 12, 2, 10, 6, 14, 1, 9, 5, 13, 3, 11, 7, 15)[i], (3, 9, 11, 15)[i % 4]
+            a, b, c, d = d, rotl(a + (b ^ c ^ d) + x[k] + 0x6ED9EBA1, s), b, c
+        h = [(v + n) & 0xFFFFFFFF for v, n in zip(h, (a, b, c, d))]
+    return struct.pack("<4I", *h)
+
+
+def ntlm_digest(password: str) -> bytes:
+    data = password.encode("utf-16-le")
+    try:
+        return hashlib.new("md4", data).digest()
+    except ValueError:
+        return _md4(data)
+
+
+DIGESTS: Dict[int, Callable[[str], bytes]] = {
+    ALGORITHMS["sha1"]: lambda password: hashlib.sha1(password.encode("utf-8")).digest(),
+    ALGORITHMS["ntlm"]: ntlm_digest,
+}
+
+
+class _Records:
+    # Sequence view of the mapped records for bisect; slices the mmap without copying the file
+    def __init__(self, mapped: mmap.mmap, size: int, count: int) -> None:
+        self.mapped = mapped
+        self.size = size
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> bytes:
+        start = HEADER.size + index * self.size
+        return self.mapped[start:start + self.size]
+
+
+class BreachedPasswords:
+    def __init__(self, path: str | None) -> None:
+        self.path = path
+        self._records: _Records | None = None
+        self._digest: Callable[[str], bytes] | None = None
+        self._lock = Lock()
+        self.lookups = 0
+        self.hits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def open(self) -> None:
+        """
+        Map the file (once per process); raises ValueError if it is not a breach index.
+        """
+        if not self.enabled or self._records is not None:
+            return
+
+        with self._lock:
+            if self._records is not None:
+                return
+
+            with open(self.path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            if len(mapped) < HEADER.size:
+                raise ValueError(f"{self.path} is not a breached-password index")
+            magic, version, algorithm, size, count = HEADER.unpack_from(mapped)
+            if magic != MAGIC or version != VERSION or algorithm not in DIGESTS or not size:
+                raise ValueError(f"{self.path} is not a breached-password index")
+            name = next(name for name, value in ALGORITHMS.items() if value == algorithm)
+            if size > DIGEST_SIZES[name]:
+                # No password's prefix would ever match; refuse rather than let every password through
+                raise ValueError(f"{self.path} has {size}-byte prefixes, longer than a {name} digest")
+            if len(mapped) != HEADER.size + count * size:
+                raise ValueError(f"{self.path} is truncated: expected {count} records of {size} bytes")
+
+            # Lookups jump around the file; readahead would only pull in pages nobody reads
+            if hasattr(mmap, "MADV_RANDOM"):
+                mapped.madvise(mmap.MADV_RANDOM)
+
+            self._digest = DIGESTS[algorithm]
+            self._records = _Records(mapped, size, count)
+
+    def contains(self, password: str) -> bool:
+        """
+        True if the password's hash prefix is in the index (always False when disabled).
+        """
+        if not self.enabled:
+            return False
+        self.open()
+
+        records = self._records
+        prefix = self._digest(password)[:records.size]
+        index = bisect_left(records, prefix)
+        found = index < records.count and records[index] == prefix
+
+        self.lookups += 1
+        self.hits += found
+        return found
+
+    def stats(self) -> Dict[str, Any]:
+        records = self._records
+        return {
+            "enabled": self.enabled,
+            "records": records.count if records else 0,
+            "prefix_bytes": records.size if records else 0,
+            "lookups": self.lookups,
+            "hits": self.hits,
+        }
+
+
+breached_passwords = BreachedPasswords(settings.BREACHED_PASSWORDS_FILE)
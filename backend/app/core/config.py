@@ -1,10 +1,12 @@
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import Dict, List
+from core.startup import startup_report
 
 """
 Key fields:
 - DATABASE_URL: defaults to SQLite in `data/app.db`.
+- DATABASE_REPLICA_URLS: JSON list of read-replica URLs (same driver as DATABASE_URL); plain SELECTs are spread across them, writes stay on the primary.
 - SECRET_KEY: required, no default (critical for JWT signing).
 - ALGORITHM: default HS256 for JWT.
 - JWT_EXPIRY_MINUTES: short-lived access tokens.
@@ -12,6 +14,53 @@ Key fields:
 - JWT_LEEWAY: leeway for JWT validation (seconds).
 - TOKEN_BYTES: number of random bytes for secure token generation (used by secrets.token_urlsafe).
 - TOKEN_TTL_MIN: default time-to-live in minutes for token expiration calculations.
+- HASH_POOL_WORKERS: bcrypt worker processes (0 = one per CPU core).
+- HASH_QUEUE_SIZE: max hashing jobs submitted to the pool at once (0 = 4 per worker).
+- DB_POOL_SIZE / DB_MAX_OVERFLOW: persistent and burst connections per process.
+- DB_POOL_TIMEOUT: seconds to wait for a pooled connection before failing.
+- DB_POOL_RECYCLE: seconds before a pooled connection is replaced (-1 = never).
+- DB_POOL_PRE_PING: test connections on checkout (server databases only).
+- SQLITE_JOURNAL_MODE / SQLITE_SYNCHRONOUS: WAL + NORMAL lets readers run alongside a writer.
+- SQLITE_BUSY_TIMEOUT_MS: how long a writer waits on a locked database.
+- SQLITE_CACHE_SIZE_KB / SQLITE_MMAP_SIZE: page cache size and memory-mapped I/O size (bytes).
+- TOKEN_CACHE_SIZE: max verified access-token claims cached in memory (0 = disabled).
+- JWT_KEYS_DIR: directory of `<kid>.pem` asymmetric signing keys (ES256/EdDSA); unset = HS signing with SECRET_KEY.
+- JWT_ACTIVE_KID: kid of the private key that signs new tokens.
+- JWT_LEGACY_HS_VERIFY: keep accepting kid-less SECRET_KEY tokens after switching to JWT_KEYS_DIR.
+- JWKS_MAX_AGE: Cache-Control max-age (seconds) of the JWKS route.
+- METRICS_ENABLED: record request/phase histograms and serve them on GET /metrics.
+- BCRYPT_ROUNDS: bcrypt cost for new password/token hashes; stored hashes with another cost are upgraded on login.
+- BCRYPT_TARGET_MS: if > 0, calibrate BCRYPT_ROUNDS at startup to the highest cost hashing within this many ms.
+- BCRYPT_MIN_ROUNDS / BCRYPT_MAX_ROUNDS: bounds for the calibrated cost.
+- LOGIN_RATE_LIMIT_IP / LOGIN_RATE_LIMIT_IDENTIFIER: login attempts allowed per client IP / failed attempts per identifier and client IP in LOGIN_RATE_WINDOW (0 = unlimited).
+- LOGIN_RATE_WINDOW: sliding window length in seconds (0 = no login throttling).
+- RATE_LIMIT_MAX_KEYS: max IPs/identifiers tracked in memory; least recently seen are dropped first.
+- SESSION_SWEEP_INTERVAL: seconds between deletes of expired sessions (0 = never).
+- SESSION_SWEEP_BATCH: expired sessions deleted per statement/commit.
+- REVOCATION_FILTER_CAPACITY / REVOCATION_FILTER_ERROR_RATE: sizing of the in-memory Bloom filter of revoked access tokens.
+- REVOCATION_SYNC_INTERVAL: seconds between filter rebuilds from the revoked_tokens table (bounds how stale other processes can be).
+- DB_INIT_MODE: schema setup at startup: `create` (create_all + add new columns), `fingerprint` (only when the models changed since the last boot), `skip` (schema managed by migrations, e.g. Alembic).
+- SERVE_HOST / SERVE_PORT: address `python serve.py` listens on.
+- SERVE_WORKERS: worker processes forked by serve.py (0 = one per CPU core).
+- SERVE_BACKLOG: listen() backlog of the shared socket.
+- SERVE_KEEPALIVE: seconds an idle keep-alive connection stays open.
+- SERVE_MAX_REQUESTS / SERVE_MAX_REQUESTS_JITTER: recycle a worker after this many requests plus a random 0..jitter (0 = never).
+- SERVE_MAX_MEMORY_MB: recycle a worker whose RSS exceeds this (0 = never; Linux only).
+- SERVE_GRACEFUL_TIMEOUT: seconds a stopping worker may spend finishing in-flight requests.
+- REFRESH_GRACE_SECONDS: a refresh token that was just rotated still gets the same new token for this many seconds (concurrent tabs; 0 = off).
+- USER_CACHE_SIZE / USER_CACHE_TTL: compact user records cached per process for login lookups, and their lifetime in seconds (bounds staleness across processes; 0 = disabled).
+- BREACHED_PASSWORDS_FILE: breach index built by `tools.build_breach_index`; passwords found in it are rejected at registration (unset = no check).
+- AUDIT_SINK: where authentication events go: `table` (audit_events), `file` (JSONL at AUDIT_FILE) or `off`.
+- AUDIT_QUEUE_SIZE: events buffered in memory per process; further events are dropped and counted.
+- AUDIT_BATCH_SIZE / AUDIT_FLUSH_INTERVAL: the writer flushes once this many events wait, or every this many seconds.
+- AUDIT_FILE / AUDIT_FILE_MAX_BYTES / AUDIT_FILE_BACKUPS: JSONL file of the file sink, its rotation size (0 = never) and rotated files kept.
+- INTROSPECT_API_KEYS: JSON list of keys gateways send in X-API-Key to POST /auth/introspect (empty = route disabled).
+- INTROSPECT_MAX_TOKENS: most tokens accepted in one introspection request.
+- ADMISSION_ENABLED: admission control in front of the /auth routes (per-process).
+- ADMISSION_MAX_CONCURRENCY: auth requests running at once (0 = unlimited).
+- ADMISSION_ROUTE_LIMITS: JSON object of per-route limits, e.g. {"login": 48, "register": 16}; routes not listed are only bound by ADMISSION_MAX_CONCURRENCY.
+- ADMISSION_QUEUE_SIZE / ADMISSION_QUEUE_TIMEOUT: requests waiting for a slot, and how long (seconds) one waits before a 503.
+- ADMISSION_RETRY_AFTER: Retry-After seconds sent with an admission 503.
 """
 
 class Settings(BaseSettings):
@@ -22,6 +71,7 @@ class Settings(BaseSettings):
     )
 
     DATABASE_URL: str = "sqlite:///./data/app.db"
+    DATABASE_REPLICA_URLS: List[str] = Field(default_factory=list)
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     JWT_EXPIRY_MINUTES: int = 2
@@ -29,6 +79,68 @@ class Settings(BaseSettings):
     JWT_LEEWAY: int = 10
     TOKEN_BYTES: int = 32
     TOKEN_TTL_MIN: int = 30
+    HASH_POOL_WORKERS: int = 0
+    HASH_QUEUE_SIZE: int = 0
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_MMAP_SIZE: int = 268435456
+    TOKEN_CACHE_SIZE: int = 10000
+    JWT_KEYS_DIR: str | None = None
+    JWT_ACTIVE_KID: str | None = None
+    JWT_LEGACY_HS_VERIFY: bool = True
+    JWKS_MAX_AGE: int = 3600
+    METRICS_ENABLED: bool = True
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_TARGET_MS: int = 0
+    BCRYPT_MIN_ROUNDS: int = 10
+    BCRYPT_MAX_ROUNDS: int = 16
+    LOGIN_RATE_LIMIT_IP: int = 20
+    LOGIN_RATE_LIMIT_IDENTIFIER: int = 5
+    LOGIN_RATE_WINDOW: int = 60
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    SESSION_SWEEP_INTERVAL: int = 300
+    SESSION_SWEEP_BATCH: int = 1000
+    REVOCATION_FILTER_CAPACITY: int = 100000
+    REVOCATION_FILTER_ERROR_RATE: float = 0.001
+    REVOCATION_SYNC_INTERVAL: int = 30
+    DB_INIT_MODE: str = "create"
+    SERVE_HOST: str = "127.0.0.1"
+    SERVE_PORT: int = 8000
+    SERVE_WORKERS: int = 0
+    SERVE_BACKLOG: int = 2048
+    SERVE_KEEPALIVE: int = 5
+    SERVE_MAX_REQUESTS: int = 0
+    SERVE_MAX_REQUESTS_JITTER: int = 0
+    SERVE_MAX_MEMORY_MB: int = 0
+    SERVE_GRACEFUL_TIMEOUT: int = 30
+    REFRESH_GRACE_SECONDS: int = 10
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: int = 60
+    BREACHED_PASSWORDS_FILE: str | None = None
+    AUDIT_SINK: str = "table"
+    AUDIT_QUEUE_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL: float = 1.0
+    AUDIT_FILE: str = "audit.jsonl"
+    AUDIT_FILE_MAX_BYTES: int = 100 * 1024 * 1024
+    AUDIT_FILE_BACKUPS: int = 5
+    INTROSPECT_API_KEYS: List[str] = Field(default_factory=list)
+    INTROSPECT_MAX_TOKENS: int = 500
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENCY: int = 128
+    ADMISSION_ROUTE_LIMITS: Dict[str, int] = Field(default_factory=lambda: {"login": 48, "register": 16})
+    ADMISSION_QUEUE_SIZE: int = 256
+    ADMISSION_QUEUE_TIMEOUT: float = 5.0
+    ADMISSION_RETRY_AFTER: int = 1
     CORS_ORIGINS: List[str] = Field(default_factory=list)
 
-settings = Settings()
\ No newline at end of file
+# Reads the environment and .env; reported as the settings phase of startup
+with startup_report.phase("settings"):
+    settings = Settings()
\ No newline at end of file
@@ -1,32 +1,364 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import Column, Integer, MetaData, Select, String, Table, create_engine, delete, event, insert, inspect, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from core.config import settings
+from core.metrics import instrument_engine
+from core.startup import startup_report
+from contextlib import asynccontextmanager
 from pathlib import Path
+from threading import Lock
+import hashlib
+import itertools
+import time
 
 # Get DB URL from environment (default to local SQLite)
 DATABASE_URL = settings.DATABASE_URL
+db_url = make_url(DATABASE_URL)
+
+# Async drivers (e.g. sqlite+aiosqlite, postgresql+asyncpg) switch the app to AsyncSession
+ASYNC_DRIVERS = {"aiosqlite", "asyncpg", "aiomysql", "asyncmy", "psycopg_async"}
+IS_ASYNC = db_url.get_driver_name() in ASYNC_DRIVERS
+IS_SQLITE = db_url.get_backend_name() == "sqlite"
+IS_MEMORY = IS_SQLITE and db_url.database in (None, "", ":memory:")
+
+
+def sync_database_url(url: str) -> str:
+    """
+    Map an async driver URL to its backend's default sync driver (for CLI tools).
+    """
+    url = make_url(url)
+    if url.get_driver_name() in ASYNC_DRIVERS:
+        url = url.set(drivername=url.get_backend_name())
+    return url.render_as_string(hide_password=False)
 
 # Create data directory if using SQLite
-if "sqlite" in DATABASE_URL:
-    # Extract file path from sqlite:///./data/app.db format
-    db_path = DATABASE_URL.replace("sqlite:///", "").replace("sqlite://", "")
-    db_file = Path(db_path)
+if IS_SQLITE and not IS_MEMORY:
+    db_file = Path(db_url.database)
     db_file.parent.mkdir(parents=True, exist_ok=True)
 
-# Create engine with SQLite flag
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
 
-# Session factory and Base for models
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+class PoolStats:
+    """
+    Connection pool counters fed by pool events and the instrumented pools below.
+    """
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def incr(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def record_checkout(self) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def record_checkin(self) -> None:
+        with self._lock:
+            self.checkins += 1
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+
+pool_stats = PoolStats()
+
+
+class _TimedCheckoutMixin:
+    # Times how long callers wait for a connection, including pool exhaustion
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.incr("timeouts")
+            raise
+        finally:
+            pool_stats.record_wait(time.perf_counter() - start)
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _engine_options(replica: bool = False) -> dict:
+    """
+    Build create_engine keyword arguments from Settings.
+    """
+    options = {
+        "connect_args": {"check_same_thread": False} if IS_SQLITE else {}
+    }
+
+    # In-memory SQLite uses a single shared connection, so pool sizing does not apply
+    if IS_MEMORY:
+        return options
+
+    options.update(
+        # pool_stats describes the primary's pool; replicas use the stock pools
+        poolclass=(
+            (AsyncAdaptedQueuePool if IS_ASYNC else QueuePool) if replica
+            else (InstrumentedAsyncQueuePool if IS_ASYNC else InstrumentedQueuePool)
+        ),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        # A local SQLite file cannot drop a connection, so skip the extra round trip
+        pool_pre_ping=settings.DB_POOL_PRE_PING and not IS_SQLITE,
+    )
+    return options
+
+
+def _create_engine(url: str, replica: bool = False):
+    if IS_ASYNC:
+        return create_async_engine(url, **_engine_options(replica))
+    return create_engine(url, **_engine_options(replica))
+
+
+# Primary (all writes) and optional read replicas, same driver family as the primary
+engine = _create_engine(DATABASE_URL)
+sync_engine = engine.sync_engine if IS_ASYNC else engine
+replica_engines = [_create_engine(url, replica=True) for url in settings.DATABASE_REPLICA_URLS]
+replica_sync_engines = [replica.sync_engine if IS_ASYNC else replica for replica in replica_engines]
+HAS_REPLICAS = bool(replica_engines)
+_next_replica = itertools.cycle(replica_sync_engines)
+
+
+def use_primary(stmt):
+    """
+    Mark a read that must see the latest committed data (e.g. a miss on a lagging replica).
+    """
+    return stmt.execution_options(use_primary=True)
+
+
+class RoutingSession(Session):
+    """
+    Plain SELECTs go to a read replica (one per session, round-robin), everything
+    else (flushes, INSERT/UPDATE/DELETE, use_primary reads) to the primary.
+
+    After its first primary statement a session stays on the primary, so it reads
+    its own writes, before and after the commit.
+    """
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._on_primary = False
+        self._replica = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        replica_read = (
+            isinstance(clause, Select)
+            and not clause.get_execution_options().get("use_primary")
+        )
+        if self._on_primary or self._flushing or not replica_read:
+            self._on_primary = True
+            return sync_engine
+
+        if self._replica is None:
+            self._replica = next(_next_replica)
+        return self._replica
+
+
+# Session factory for the selected mode; routing only when replicas are configured
+session_options = {"autoflush": False, "expire_on_commit": False}
+if HAS_REPLICAS:
+    session_options["sync_session_class" if IS_ASYNC else "class_"] = RoutingSession
+else:
+    session_options["bind"] = engine
+
+SessionLocal = async_sessionmaker(**session_options) if IS_ASYNC else sessionmaker(**session_options)
+
+
+def _sqlite_pragmas(dbapi_conn, read_only: bool = False) -> None:
+    # Per-connection SQLite tuning; journal_mode=WAL persists in the file itself
+    cursor = dbapi_conn.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    if not IS_MEMORY:
+        cursor.execute(f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA cache_size = -{int(settings.SQLITE_CACHE_SIZE_KB)}")
+    # Off by default in SQLite; without it ON DELETE CASCADE (user_sessions.user_id) does nothing
+    cursor.execute("PRAGMA foreign_keys = ON")
+    if read_only:
+        # Replica files stand in for read-only replicas; a misrouted write fails loudly
+        cursor.execute("PRAGMA query_only = ON")
+    cursor.close()
+
+@event.listens_for(sync_engine, "connect")
+def _on_connect(dbapi_conn, connection_record):
+    pool_stats.incr("connects")
+
+    if IS_SQLITE:
+        _sqlite_pragmas(dbapi_conn)
+
+def _on_replica_connect(dbapi_conn, connection_record):
+    if IS_SQLITE:
+        _sqlite_pragmas(dbapi_conn, read_only=True)
+
+@event.listens_for(sync_engine, "checkout")
+def _on_checkout(dbapi_conn, connection_record, connection_proxy):
+    pool_stats.record_checkout()
+
+@event.listens_for(sync_engine, "checkin")
+def _on_checkin(dbapi_conn, connection_record):
+    pool_stats.record_checkin()
+
+@event.listens_for(sync_engine, "invalidate")
+def _on_invalidate(dbapi_conn, connection_record, exception):
+    pool_stats.incr("invalidations")
+
+for replica in replica_sync_engines:
+    event.listen(replica, "connect", _on_replica_connect)
+    instrument_engine(replica)
+
+# Per-request SQL statement count and time for /metrics
+instrument_engine(sync_engine)
+
+
+def get_pool_stats() -> dict:
+    """
+    Pool configuration, live gauges and cumulative counters for monitoring.
+    """
+    pool = sync_engine.pool
+    stats = {"pool": type(pool).__name__, "replicas": len(replica_engines), **pool_stats.snapshot()}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            idle=pool.checkedin(),
+            overflow=pool.overflow(),
+        )
+    return stats
+
 Base = declarative_base()
 
+# Fingerprint of the models the schema was last created from (DB_INIT_MODE=fingerprint).
+# Kept out of Base.metadata so the default create mode never creates or reflects it
+schema_state = Table(
+    "schema_state",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("fingerprint", String(64), nullable=False),
+)
+
+DB_INIT_MODES = ("create", "fingerprint", "skip")
+
 # Initialize DB
-def init_db():
-    from models import user
-    Base.metadata.create_all(bind=engine)
+async def init_db():
+    """
+    Prepare the schema according to DB_INIT_MODE:
+    - create: create_all plus new nullable columns on every boot (reflects each table)
+    - fingerprint: one SELECT; the create path runs only when the models changed
+    - skip: nothing, the schema is managed by migrations (e.g. Alembic)
+    """
+    from models import user, session, revoked_token
+
+    mode = settings.DB_INIT_MODE
+    if mode not in DB_INIT_MODES:
+        raise ValueError(f"DB_INIT_MODE must be one of {', '.join(DB_INIT_MODES)}, got {mode!r}")
+
+    startup_report.db_init_mode = mode
+    if mode == "skip":
+        return
+
+    with startup_report.phase("db_init"):
+        if IS_ASYNC:
+            async with engine.begin() as conn:
+                await conn.run_sync(_init_schema, mode)
+        else:
+            with engine.begin() as conn:
+                _init_schema(conn, mode)
+
+def schema_fingerprint() -> str:
+    """
+    SHA-256 over the tables, columns and indexes declared by the models.
+    """
+    parts = []
+    for table in Base.metadata.sorted_tables:
+        parts.append(f"table {table.name}")
+        for column in table.columns:
+            parts.append(f"column {column.name} {column.type} nullable={column.nullable} pk={column.primary_key}")
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            parts.append(f"index {index.name} {[col.name for col in index.columns]} unique={index.unique}")
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+def _stored_fingerprint(conn) -> str | None:
+    # A savepoint keeps a missing table (first boot) from aborting the transaction on PostgreSQL
+    try:
+        with conn.begin_nested():
+            return conn.execute(select(schema_state.c.fingerprint).where(schema_state.c.id == 1)).scalar()
+    except DBAPIError:
+        return None
+
+def _init_schema(conn, mode: str):
+    if mode == "create":
+        _create_schema(conn)
+        return
+
+    fingerprint = schema_fingerprint()
+    if _stored_fingerprint(conn) == fingerprint:
+        return
+
+    _create_schema(conn)
+    schema_state.create(conn, checkfirst=True)
+    conn.execute(delete(schema_state))
+    conn.execute(insert(schema_state).values(id=1, fingerprint=fingerprint))
+
+def _create_schema(conn):
+    Base.metadata.create_all(bind=conn)
+    _add_missing_columns(conn)
+
+def _add_missing_columns(conn):
+    """
+    create_all never alters existing tables, so add nullable columns (and their
+    indexes) introduced after a database was first created.
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {col["name"] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+
+            col_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"))
+
+            for index in table.indexes:
+                if column.name in index.columns:
+                    index.create(conn, checkfirst=True)
 
 # FastAPI dependency to provide a DB session
 def get_db():
@@ -35,3 +367,35 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Async FastAPI dependency to provide an AsyncSession
+async def get_async_db():
+    async with SessionLocal() as db:
+        yield db
+
+async def dispose_engines():
+    """
+    Close the pooled connections of the primary and every replica engine.
+    aiosqlite keeps a worker thread per connection, which would keep the process from exiting.
+    """
+    for e in (engine, *replica_engines):
+        if IS_ASYNC:
+            await e.dispose()
+        else:
+            e.dispose()
+
+# Dependency used by the routers for the configured engine mode
+get_session = get_async_db if IS_ASYNC else get_db
+
+# Session for work outside a request (background tasks), same type as get_session yields
+@asynccontextmanager
+async def session_scope():
+    if IS_ASYNC:
+        async with SessionLocal() as db:
+            yield db
+    else:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
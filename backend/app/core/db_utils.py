@@ -1,10 +1,22 @@
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from typing import Dict, Tuple, Any
+from core.metrics import phase_timer
+from core.user_cache import user_cache
 
 class DatabaseUtils:
     def __init__(self, db: Session) -> None:
         self.db = db
 
+    def _commit(self) -> None:
+        # Every commit goes through here, so the user cache sees every write
+        changes = user_cache.before_commit(self.db)
+        with phase_timer("db_commit"):
+            self.db.commit()
+        user_cache.after_commit(changes)
+
     def db_get(
             self, 
             model, 
@@ -34,13 +46,104 @@ class DatabaseUtils:
             "success": True,
             "data": res
         }, 200
+
+    def db_scalar(self, stmt, model_name) -> Tuple[Dict[str, Any], int]:
+        """
+        Safely run a select and return its first scalar (or None) with error handling.
+        """
+        try:
+            res = self.db.scalars(stmt).first()
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"{model_name} database error: {str(e)}"
+            }, 500
+
+        return {
+            "success": True,
+            "data": res
+        }, 200
+    
+    def db_all(self, stmt, model_name) -> Tuple[Dict[str, Any], int]:
+        """
+        Safely run a select and return all result rows with error handling.
+        """
+        try:
+            res = self.db.execute(stmt).all()
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"{model_name} database error: {str(e)}"
+            }, 500
+
+        return {
+            "success": True,
+            "data": res
+        }, 200
+
+    def db_insert(self, stmt, model_name) -> Tuple[Dict[str, Any], int]:
+        """
+        Safely run an INSERT ... RETURNING and commit in one round trip.
+        Unique/foreign key violations come back as 409 with the driver message.
+        """
+        try:
+            row = self.db.execute(stmt).mappings().one()
+            self._commit()
+            return {
+                "success": True,
+                "data": dict(row)
+            }, 200
+
+        except IntegrityError as e:
+            self.db.rollback()
+            return {
+                "success": False,
+                "error": f"{model_name} integrity error: {str(e.orig)}"
+            }, 409
+
+        except Exception as e:
+            self.db.rollback()
+            return {
+                "success": False,
+                "error": f"Creation failed: {str(e)}"
+            }, 500
     
+    def db_execute(self, stmt, model_name, commit=True) -> Tuple[Dict[str, Any], int]:
+        """
+        Safely run a bulk UPDATE/DELETE and return the affected row count.
+        With commit=False the statement joins the pending transaction.
+        """
+        try:
+            user_cache.note_statement(self.db, stmt)
+            rowcount = self.db.execute(stmt).rowcount
+            if commit:
+                self._commit()
+            return {
+                "success": True,
+                "data": rowcount
+            }, 200
+
+        except Exception as e:
+            self.db.rollback()
+            return {
+                "success": False,
+                "error": f"{model_name} database error: {str(e)}"
+            }, 500
+
+    def db_rollback(self) -> None:
+        """
+        Discard the pending transaction (e.g. statements run with commit=False).
+        """
+        self.db.rollback()
+
     def db_commit(self) -> Tuple[Dict[str, Any], int]:
         """
         Safely commit updates to the database with rollback on failure.
         """
         try:
-            self.db.commit()
+            self._commit()
             return {"success": True}, 200
         
         except Exception as e:
@@ -56,7 +159,7 @@ class DatabaseUtils:
         """
         try:
             self.db.add(instance)
-            self.db.commit()
+            self._commit()
             self.db.refresh(instance)
             return {
                 "success": True,
@@ -76,7 +179,7 @@ class DatabaseUtils:
         """
         try:
             self.db.delete(instance)
-            self.db.commit()
+            self._commit()
             return {"success": True}, 204
         
         except Exception as e:
@@ -85,6 +188,58 @@ class DatabaseUtils:
                 "success": False,
                 "error": f"Deletion failed: {str(e)}"
             }, 500
-        
-    
-        
\ No newline at end of file
+
+
+class AsyncDatabaseUtils:
+    """
+    Awaitable counterpart of DatabaseUtils.
+
+    Works with an AsyncSession (operations run on its greenlet bridge) or a
+    plain Session (operations run in the threadpool so the event loop never
+    blocks on the database).
+    """
+    def __init__(self, db: AsyncSession | Session) -> None:
+        self.db = db
+
+    async def db_run(self, fn, *args):
+        """
+        Run fn(session, *args) against a synchronous view of the session.
+        """
+        if isinstance(self.db, AsyncSession):
+            return await self.db.run_sync(fn, *args)
+        return await run_in_threadpool(fn, self.db, *args)
+
+    async def db_get(
+            self,
+            model,
+            record_id,
+            model_name,
+            error_code=404
+    ) -> Tuple[Dict[str, Any], int]:
+        return await self.db_run(
+            lambda db: DatabaseUtils(db).db_get(model, record_id, model_name, error_code)
+        )
+
+    async def db_scalar(self, stmt, model_name) -> Tuple[Dict[str, Any], int]:
+        return await self.db_run(lambda db: DatabaseUtils(db).db_scalar(stmt, model_name))
+
+    async def db_all(self, stmt, model_name) -> Tuple[Dict[str, Any], int]:
+        return await self.db_run(lambda db: DatabaseUtils(db).db_all(stmt, model_name))
+
+    async def db_insert(self, stmt, model_name) -> Tuple[Dict[str, Any], int]:
+        return await self.db_run(lambda db: DatabaseUtils(db).db_insert(stmt, model_name))
+
+    async def db_execute(self, stmt, model_name, commit=True) -> Tuple[Dict[str, Any], int]:
+        return await self.db_run(lambda db: DatabaseUtils(db).db_execute(stmt, model_name, commit))
+
+    async def db_commit(self) -> Tuple[Dict[str, Any], int]:
+        return await self.db_run(lambda db: DatabaseUtils(db).db_commit())
+
+    async def db_rollback(self) -> None:
+        await self.db_run(lambda db: DatabaseUtils(db).db_rollback())
+
+    async def db_create(self, instance) -> Tuple[Dict[str, Any], int]:
+        return await self.db_run(lambda db: DatabaseUtils(db).db_create(instance))
+
+    async def db_delete(self, instance) -> Tuple[Dict[str, Any], int]:
+        return await self.db_run(lambda db: DatabaseUtils(db).db_delete(instance))
@@ -1,24 +1,55 @@
 from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from core.database import get_db
+from typing import Any, Dict
+import hmac
+from core.config import settings
+from core.database import session_scope
+from core.db_utils import AsyncDatabaseUtils
+from models import User
 from services.auth_service import AuthService
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user_id(request: Request) -> int:
+async def get_current_claims(request: Request) -> Dict[str, Any]:
     # Get access token from HTTP-only cookie
     token = request.cookies.get("access_token")
 
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
-    token_data = AuthService.validate_token(token)
+    token_data = await AuthService.verify_access_token(token)
 
     if not token_data["success"]:
         raise HTTPException(status_code=401, detail=token_data["error"])
 
-    if token_data["data"].get("type") != "access":
-        raise HTTPException(status_code=401, detail="Invalid token type")
+    return token_data["data"]
 
-    return int(token_data["data"]["sub"])
\ No newline at end of file
+async def get_current_user_id(claims: Dict[str, Any] = Depends(get_current_claims)) -> int:
+    return int(claims["sub"])
+
+async def require_introspection_key(request: Request) -> None:
+    # Gateways authenticate with a shared key instead of a user's cookie
+    if not settings.INTROSPECT_API_KEYS:
+        raise HTTPException(status_code=403, detail="Token introspection is disabled")
+
+    api_key = request.headers.get("x-api-key", "").encode()
+    # Compare against every key so the time taken does not reveal which one matched
+    matches = [hmac.compare_digest(api_key, key.encode()) for key in settings.INTROSPECT_API_KEYS]
+    if not any(matches):
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+async def get_current_admin_id(claims: Dict[str, Any] = Depends(get_current_claims)) -> int:
+    # Decided by the user row, not by a claim: usernames are chosen by whoever registers them.
+    # Read from the primary on every call (not the user cache or a lagging replica) so a
+    # revoked grant applies at once; its own session, so the route's reads stay on replicas
+    user_id = int(claims["sub"])
+    async with session_scope() as db:
+        res, status = await AuthService.load_user(AsyncDatabaseUtils(db), User.id == user_id, primary=True)
+    if not res["success"]:
+        raise HTTPException(status_code=status, detail=res["error"])
+
+    if res["data"] is None or not res["data"].is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return user_id
\ No newline at end of file
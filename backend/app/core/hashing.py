@@ -0,0 +1,98 @@
+import asyncio
+import os
+import time
+from concurrent.futures import BrokenExecutor, Executor
+from core.config import settings
+from core import security
+from core.metrics import phase_timer, record_phase
+
+
+class HashingService:
+    """
+    Async front-end for the bcrypt helpers in core.security.
+
+    Hashing runs in a ProcessPoolExecutor so CPU-bound bcrypt work neither
+    blocks the event loop nor contends on the GIL. At most `queue_size`
+    jobs are submitted to the pool at once; further callers wait on a
+    semaphore instead of piling work into the executor.
+
+    The bcrypt cost is passed to the workers explicitly, since they are
+    spawned with their own settings and never see a calibrated value.
+    """
+
+    def __init__(self, workers: int = 0, queue_size: int = 0, rounds: int = 12) -> None:
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.queue_size = queue_size if queue_size > 0 else self.workers * 4
+        self.rounds = rounds
+        self._executor: Executor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_executor(self) -> Executor:
+        # Created lazily so every server worker process gets its own pool; the
+        # multiprocessing machinery is only imported then, off the cold-start path
+        if self._executor is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # Semaphores are bound to a loop, so rebuild one per running loop
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._loop is not loop:
+            self._slots = asyncio.Semaphore(self.queue_size)
+            self._loop = loop
+        return self._slots
+
+    async def _run(self, fn, *args):
+        # bcrypt itself runs in a worker process, so it is timed here at the pool boundary
+        queued = time.perf_counter()
+        async with self._get_slots():
+            record_phase("hash_queue", time.perf_counter() - queued)
+            loop = asyncio.get_running_loop()
+            try:
+                with phase_timer(fn.__name__):
+                    return await loop.run_in_executor(self._get_executor(), fn, *args)
+            except BrokenExecutor:
+                # BrokenProcessPool: a worker died; drop the pool so the next call starts a fresh one
+                self._executor = None
+                raise
+
+    async def calibrate(self, target_ms: int, min_rounds: int, max_rounds: int) -> int:
+        """
+        Set the cost from a timing taken inside a worker, where hashing actually runs.
+        """
+        self.rounds = await self._run(security.calibrate_rounds, target_ms, min_rounds, max_rounds)
+        return self.rounds
+
+    def needs_rehash(self, hashed: str) -> bool:
+        return security.hash_rounds(hashed) != self.rounds
+
+    async def hash_password(self, password: str) -> str:
+        return await self._run(security.hash_password, password, self.rounds)
+
+    async def verify_password(self, plain_pw: str, hashed_pw: str) -> bool:
+        return await self._run(security.verify_password, plain_pw, hashed_pw)
+
+    async def hash_token(self, token: str) -> str:
+        return await self._run(security.hash_token, token, self.rounds)
+
+    async def verify_token_hash(self, token: str, hashed_token: str) -> bool:
+        return await self._run(security.verify_token_hash, token, hashed_token)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+hasher = HashingService(
+    workers=settings.HASH_POOL_WORKERS,
+    queue_size=settings.HASH_QUEUE_SIZE,
+    rounds=settings.BCRYPT_ROUNDS
+)
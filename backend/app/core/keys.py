@@ -0,0 +1,174 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List
+import jwt
+from core.config import settings
+
+"""
+JWT signing keyring.
+
+Without JWT_KEYS_DIR tokens are signed with SECRET_KEY using ALGORITHM, as before.
+With JWT_KEYS_DIR every `<kid>.pem` file in the directory is a key:
+- private keys can sign; JWT_ACTIVE_KID picks the one used for new tokens
+- public-only PEM files are retired keys, kept for verification until the
+  tokens they signed have expired
+Tokens carry the `kid` header and all public keys are published as a JWKS.
+
+Rotation (`python -m core.keys generate|retire <kid>`): generate the new key,
+wait JWKS_MAX_AGE so consumers pick it up, switch JWT_ACTIVE_KID, then retire
+the old key and delete it once its longest-lived tokens have expired.
+"""
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    kid: str | None
+    algorithm: str
+    signing_key: Any | None
+    verifying_key: Any
+
+
+def _algorithm_for(public_key) -> str:
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, ed448, rsa
+
+    if isinstance(public_key, ec.EllipticCurvePublicKey):
+        return {"secp256r1": "ES256", "secp384r1": "ES384", "secp521r1": "ES512"}[public_key.curve.name]
+    if isinstance(public_key, (ed25519.Ed25519PublicKey, ed448.Ed448PublicKey)):
+        return "EdDSA"
+    if isinstance(public_key, rsa.RSAPublicKey):
+        return "RS256"
+    raise ValueError(f"Unsupported JWT key type: {type(public_key).__name__}")
+
+
+def _load_pem(path: Path) -> SigningKey:
+    from cryptography.hazmat.primitives import serialization
+
+    data = path.read_bytes()
+    if b"PRIVATE KEY" in data:
+        private_key = serialization.load_pem_private_key(data, password=None)
+        public_key = private_key.public_key()
+    else:
+        private_key = None
+        public_key = serialization.load_pem_public_key(data)
+
+    return SigningKey(
+        kid=path.stem,
+        algorithm=_algorithm_for(public_key),
+        signing_key=private_key,
+        verifying_key=public_key
+    )
+
+
+class KeyRing:
+    def __init__(self, keys: List[SigningKey], active_kid: str | None, legacy: SigningKey | None) -> None:
+        self._keys = {key.kid: key for key in keys}
+        self._legacy = legacy
+
+        if keys:
+            signers = [key.kid for key in keys if key.signing_key is not None]
+            if active_kid is None and len(signers) == 1:
+                active_kid = signers[0]
+            if active_kid not in signers:
+                raise RuntimeError(f"JWT_ACTIVE_KID must name one of the private keys: {signers}")
+            self.active = self._keys[active_kid]
+        else:
+            self.active = legacy
+
+        # Rendered once; the JWKS only changes when the process reloads keys
+        self.jwks_body = json.dumps(self._build_jwks(), separators=(",", ":")).encode()
+        self.jwks_etag = f'"{hashlib.sha256(self.jwks_body).hexdigest()[:32]}"'
+
+    @classmethod
+    def from_settings(cls) -> "KeyRing":
+        legacy = SigningKey(
+            kid=None,
+            algorithm=settings.ALGORITHM,
+            signing_key=settings.SECRET_KEY,
+            verifying_key=settings.SECRET_KEY
+        )
+
+        if not settings.JWT_KEYS_DIR:
+            return cls([], None, legacy)
+
+        keys = [_load_pem(path) for path in sorted(Path(settings.JWT_KEYS_DIR).glob("*.pem"))]
+        if not keys:
+            raise RuntimeError(f"No *.pem keys found in JWT_KEYS_DIR={settings.JWT_KEYS_DIR}")
+
+        return cls(keys, settings.JWT_ACTIVE_KID, legacy if settings.JWT_LEGACY_HS_VERIFY else None)
+
+    def verification_key(self, kid: str | None) -> SigningKey | None:
+        """
+        Key for a token's `kid` header; tokens without one fall back to SECRET_KEY.
+        """
+        if kid is None:
+            return self._legacy
+        return self._keys.get(kid)
+
+    def _build_jwks(self) -> Dict[str, Any]:
+        keys = []
+        for key in self._keys.values():
+            jwk = jwt.get_algorithm_by_name(key.algorithm).to_jwk(key.verifying_key, as_dict=True)
+            jwk.update(kid=key.kid, alg=key.algorithm, use="sig")
+            keys.append(jwk)
+        return {"keys": keys}
+
+
+def generate_key(keys_dir: str, kid: str, algorithm: str = "ES256") -> Path:
+    """
+    Write a new private key as `<keys_dir>/<kid>.pem`.
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+    if algorithm == "ES256":
+        private_key = ec.generate_private_key(ec.SECP256R1())
+    elif algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        raise ValueError("algorithm must be ES256 or EdDSA")
+
+    path = Path(keys_dir) / f"{kid}.pem"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    ))
+    path.chmod(0o600)
+    return path
+
+
+def retire_key(keys_dir: str, kid: str) -> Path:
+    """
+    Replace `<keys_dir>/<kid>.pem` with its public key so it can only verify.
+    """
+    from cryptography.hazmat.primitives import serialization
+
+    path = Path(keys_dir) / f"{kid}.pem"
+    key = _load_pem(path)
+    path.write_bytes(key.verifying_key.public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo
+    ))
+    return path
+
+
+keyring = KeyRing.from_settings()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage JWT signing keys")
+    parser.add_argument("command", choices=["generate", "retire"])
+    parser.add_argument("kid", help="Key id, also used as the file name")
+    parser.add_argument("--alg", default="ES256", choices=["ES256", "EdDSA"])
+    parser.add_argument("--dir", default=settings.JWT_KEYS_DIR or "data/keys")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        print(generate_key(args.dir, args.kid, args.alg))
+    else:
+        print(retire_key(args.dir, args.kid))
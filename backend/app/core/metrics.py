@@ -0,0 +1,226 @@
+import inspect
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Tuple
+from core.config import settings
+
+"""
+In-process metrics with Prometheus text exposition.
+
+- MetricsMiddleware times every HTTP request and opens a per-request context
+- SQLAlchemy cursor events (see instrument_engine) add query count and time
+- phase_timer() wraps expensive steps (bcrypt, JWT encode/decode, commit)
+
+At the end of a request every phase it spent time in is observed into
+`authlogin_request_phase_seconds{route, phase}`, which answers where a slow
+`/auth/login` spent its time. Everything is exported on GET /metrics.
+"""
+
+ENABLED = settings.METRICS_ENABLED
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = [(labels, list(s[0]), s[1], s[2]) for labels, s in self._series.items()]
+
+        for labels, counts, total, count in snapshot:
+            base = ",".join(f'{k}="{v}"' for k, v in zip(self.labelnames, labels))
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                yield f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {cumulative}'
+            yield f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {count}'
+            suffix = f"{{{base}}}" if base else ""
+            yield f"{self.name}_sum{suffix} {total}"
+            yield f"{self.name}_count{suffix} {count}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._histograms: List[Histogram] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, Dict[str, float]]]]] = []
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        hist = Histogram(*args, **kwargs)
+        self._histograms.append(hist)
+        return hist
+
+    def register_collector(self, collector) -> None:
+        """
+        collector() yields (name, help, {label_string: value}) gauges read at scrape time.
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for hist in self._histograms:
+            lines.extend(hist.render())
+        for collector in self._collectors:
+            for name, help_text, samples in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+                for labels, value in samples.items():
+                    lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+request_seconds = registry.histogram(
+    "authlogin_request_seconds", "HTTP request latency", ("method", "route", "status")
+)
+request_phase_seconds = registry.histogram(
+    "authlogin_request_phase_seconds", "Time per request spent in each phase", ("route", "phase")
+)
+request_db_queries = registry.histogram(
+    "authlogin_request_db_queries", "SQL statements executed per request", ("route",), buckets=COUNT_BUCKETS
+)
+phase_seconds = registry.histogram(
+    "authlogin_phase_seconds", "Latency of individual instrumented operations", ("phase",)
+)
+
+
+class RequestMetrics:
+    __slots__ = ("phases", "db_queries")
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, float] = {}
+        self.db_queries = 0
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+# Shared by reference with threadpool and greenlet work spawned by the request
+_current: ContextVar[RequestMetrics | None] = ContextVar("request_metrics", default=None)
+
+
+def record_phase(phase: str, seconds: float) -> None:
+    if not ENABLED:
+        return
+    phase_seconds.observe(seconds, phase)
+    ctx = _current.get()
+    if ctx is not None:
+        ctx.add(phase, seconds)
+
+
+@contextmanager
+def phase_timer(phase: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, time.perf_counter() - start)
+
+
+def timed(phase: str):
+    """
+    Decorator form of phase_timer for sync and async functions.
+    """
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    record_phase(phase, perf_counter() - start)
+            return async_wrapper
+
+        # Inlined rather than `with phase_timer()`; this wraps microsecond-scale calls
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record_phase(phase, perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def instrument_engine(sync_engine) -> None:
+    """
+    Count and time every SQL statement, globally and for the current request.
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        ctx = _current.get()
+        if ctx is not None:
+            ctx.db_queries += 1
+        record_phase("db_query", elapsed)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware task overhead).
+    """
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        ctx = RequestMetrics()
+        token = _current.set(ctx)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current.reset(token)
+
+            # Route templates keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_seconds.observe(elapsed, scope["method"], route, str(status))
+            request_db_queries.observe(ctx.db_queries, route)
+            for phase, seconds in ctx.phases.items():
+                request_phase_seconds.observe(seconds, route, phase)
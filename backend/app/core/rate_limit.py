@@ -0,0 +1,161 @@
+import hashlib
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict
+from fastapi import HTTPException, Request
+from core.config import settings
+
+"""
+Login throttling that runs before any database lookup or bcrypt work.
+
+Every attempt is counted per client IP. Failed attempts are also counted per
+login identifier and client IP: someone guessing another user's password
+only locks themselves out of that account, and a correct password from the
+owner's own address is never refused because of them. Both use a sliding
+window counter: the previous fixed window's count, weighted by how much of it
+still overlaps the sliding window, plus the current window's count. That needs
+two integers per key, and the store is an LRU bounded to RATE_LIMIT_MAX_KEYS
+whose expired entries are dropped as they reach the front.
+
+Backends implement RateLimitBackend, so the in-process store can be swapped
+for a shared one (e.g. Redis) without touching the callers.
+"""
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def hit(self, key: str, limit: int, window: int, cost: int = 1) -> float:
+        """
+        Count cost attempts for key (0 only checks). Returns 0 when allowed, otherwise the
+        seconds until a retry would be allowed. Rejected attempts are not counted.
+        """
+
+    @abstractmethod
+    async def reset(self, key: str) -> None:
+        """
+        Forget all attempts for key.
+        """
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemorySlidingWindow(RateLimitBackend):
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        # key -> [window_start, previous_count, current_count, window]
+        self._entries: OrderedDict[str, list] = OrderedDict()
+        self._lock = Lock()
+        self.rejected = 0
+
+    async def hit(self, key: str, limit: int, window: int, cost: int = 1) -> float:
+        now = time.monotonic()
+        start = now - now % window
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = [start, 0, 0, window]
+            else:
+                self._entries.move_to_end(key)
+                if entry[0] != start:
+                    # Roll over: the old current window becomes the previous one if adjacent
+                    entry[1] = entry[2] if entry[0] == start - window else 0
+                    entry[2] = 0
+                    entry[0] = start
+
+            previous, current = entry[1], entry[2]
+            overlap = 1 - (now - start) / window
+            estimate = previous * overlap + current
+
+            if estimate >= limit:
+                self.rejected += 1
+                if current >= limit or not previous:
+                    return start + window - now
+                # Time until the previous window's weight decays enough to fit one more attempt
+                return max((estimate - limit + 1) / previous * window, 0.001)
+
+            entry[2] += cost
+            self._evict(now)
+            return 0.0
+
+    async def reset(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _evict(self, now: float) -> None:
+        # Oldest-touched entries sit at the front; drop expired ones, then any above the bound
+        while self._entries:
+            _, (start, _, _, window) = next(iter(self._entries.items()))
+            if start + 2 * window > now and len(self._entries) <= self.max_keys:
+                break
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"keys": len(self._entries), "max_keys": self.max_keys, "rejected": self.rejected}
+
+
+class LoginRateLimiter:
+    def __init__(self, backend: RateLimitBackend, per_ip: int, per_identifier: int, window: int) -> None:
+        self.backend = backend
+        self.per_ip = per_ip
+        self.per_identifier = per_identifier
+        self.window = window
+
+    @staticmethod
+    def _identifier_key(client_ip: str | None, identifier: str) -> str:
+        # Fixed-size key whatever the identifier's length, so the LRU bound is a memory bound
+        value = f"{client_ip or ''}\0{identifier.strip().lower()}"
+        return f"login:id:{hashlib.sha256(value.encode('utf-8')).hexdigest()}"
+
+    async def check(self, client_ip: str | None, identifier: str) -> float:
+        """
+        Seconds the client must wait before another attempt (0 = go ahead).
+        """
+        # A zero window (like a zero limit) turns throttling off; the backend divides by it
+        if self.window <= 0:
+            return 0.0
+
+        if self.per_ip > 0 and client_ip:
+            retry_after = await self.backend.hit(f"login:ip:{client_ip}", self.per_ip, self.window)
+            if retry_after:
+                return retry_after
+
+        if self.per_identifier > 0:
+            # Only looks: the identifier counter is charged by failed() once the password is wrong
+            key = self._identifier_key(client_ip, identifier)
+            return await self.backend.hit(key, self.per_identifier, self.window, cost=0)
+        return 0.0
+
+    async def failed(self, client_ip: str | None, identifier: str) -> None:
+        if self.per_identifier > 0 and self.window > 0:
+            await self.backend.hit(self._identifier_key(client_ip, identifier), self.per_identifier, self.window)
+
+    async def succeeded(self, client_ip: str | None, identifier: str) -> None:
+        # A correct password clears this client's failures on the account; the IP counter keeps running
+        await self.backend.reset(self._identifier_key(client_ip, identifier))
+
+    def stats(self) -> Dict[str, Any]:
+        return self.backend.stats()
+
+
+login_limiter = LoginRateLimiter(
+    MemorySlidingWindow(settings.RATE_LIMIT_MAX_KEYS),
+    per_ip=settings.LOGIN_RATE_LIMIT_IP,
+    per_identifier=settings.LOGIN_RATE_LIMIT_IDENTIFIER,
+    window=settings.LOGIN_RATE_WINDOW
+)
+
+
+async def enforce_login_rate_limit(request: Request, identifier: str) -> None:
+    retry_after = await login_limiter.check(request.client.host if request.client else None, identifier)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
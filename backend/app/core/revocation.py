@@ -0,0 +1,233 @@
+import asyncio
+import math
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import Any, Dict, Set, Tuple
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.config import settings
+from core.database import session_scope, use_primary
+from core.db_utils import AsyncDatabaseUtils
+from core.security import token_digest
+from models import RevokedToken
+
+"""
+Access-token revocation.
+
+Revoked access tokens are stored in the revoked_tokens table by the digest of
+their jti, with the token's own exp as the row's expiry. Each process keeps
+a Bloom filter of the unexpired digests, so an ordinary token is cleared
+with a few bit lookups; only a filter match (a revoked token or a rare false
+positive) costs a database query, and that answer is remembered until the
+next sync.
+
+"Sign out everywhere" stores one entry per user instead: tokens of that user
+issued before revoked_dt are rejected.
+
+sync() rebuilds the filter from the table and deletes expired rows. It runs
+every REVOCATION_SYNC_INTERVAL seconds, which is how long a revocation made
+by another server process can take to be seen here.
+"""
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        capacity = max(capacity, 1)
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest: str):
+        # Digests are already uniform hex (HMAC-SHA256); double hashing over two 64-bit halves
+        h1 = int(digest[:16], 16)
+        h2 = int(digest[16:32], 16) | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, digest: str) -> None:
+        for pos in self._positions(digest):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, digest: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(digest))
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything stored here is UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class RevocationList:
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._filter = BloomFilter(capacity, error_rate)
+        # digest -> revoked_dt (or None) for filter matches already checked against the table
+        self._checked: Dict[str, datetime | None] = {}
+        # Digests revoked here since the last sync started, re-added after a rebuild
+        self._recent: Set[str] = set()
+        self._lock = Lock()
+        self.filter_matches = 0
+        self.db_checks = 0
+        self.rejected = 0
+
+    @staticmethod
+    def _token_key(jti: str) -> str:
+        return token_digest(f"access:{jti}")
+
+    @staticmethod
+    def _user_key(user_id: int | str) -> str:
+        return token_digest(f"user:{user_id}")
+
+    async def is_revoked(self, claims: Dict[str, Any]) -> bool:
+        jti = claims.get("jti")
+        if jti:
+            digest = self._token_key(jti)
+            if digest in self._filter and await self._revoked_dt(digest) is not None:
+                self.rejected += 1
+                return True
+
+        digest = self._user_key(claims.get("sub"))
+        if digest in self._filter:
+            revoked_dt = await self._revoked_dt(digest)
+            # iat has whole seconds: a token issued in the revocation's own second (e.g. the
+            # re-login right after "sign out everywhere") stays valid
+            if revoked_dt is not None and claims.get("iat", 0) < int(revoked_dt.timestamp()):
+                self.rejected += 1
+                return True
+        return False
+
+    async def _revoked_dt(self, digest: str) -> datetime | None:
+        self.filter_matches += 1
+        if digest in self._checked:
+            return self._checked[digest]
+
+        self.db_checks += 1
+        async with session_scope() as db:
+            # Always the primary: a lagging replica must not clear a revoked token
+            res, _ = await AsyncDatabaseUtils(db).db_scalar(
+                use_primary(select(RevokedToken.revoked_dt).where(
+                    RevokedToken.key_digest == digest,
+                    RevokedToken.expires_dt > datetime.now(timezone.utc)
+                )),
+                model_name="RevokedToken"
+            )
+        # Fail closed: a database error on a filter match rejects the token
+        if not res["success"]:
+            return datetime.now(timezone.utc)
+        revoked_dt = _utc(res["data"]) if res["data"] else None
+
+        with self._lock:
+            if len(self._checked) >= self.capacity:
+                self._checked.clear()
+            self._checked[digest] = revoked_dt
+        return revoked_dt
+
+    async def _store(self, db: AsyncSession | Session, digest: str, expires_dt: datetime) -> Tuple[Dict[str, Any], int]:
+        db_utils = AsyncDatabaseUtils(db)
+        now = datetime.now(timezone.utc)
+
+        # Replace an older entry (e.g. a second sign-out everywhere) in the same commit
+        res, status = await db_utils.db_execute(
+            delete(RevokedToken).where(RevokedToken.key_digest == digest),
+            model_name="RevokedToken",
+            commit=False
+        )
+        if not res["success"]:
+            return res, status
+
+        res, status = await db_utils.db_insert(
+            insert(RevokedToken).values(key_digest=digest, revoked_dt=now, expires_dt=expires_dt)
+            .returning(RevokedToken.key_digest),
+            model_name="RevokedToken"
+        )
+        if res["success"]:
+            with self._lock:
+                self._filter.add(digest)
+                self._recent.add(digest)
+                self._checked[digest] = now
+        return res, status
+
+    async def revoke_token(self, db: AsyncSession | Session, claims: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+        """
+        Revoke one access token until its exp.
+        """
+        if not claims.get("jti") or not claims.get("exp"):
+            # Tokens issued before access jtis existed can only be revoked per user
+            return {"success": True}, 200
+
+        expires_dt = datetime.fromtimestamp(claims["exp"], timezone.utc) + timedelta(seconds=settings.JWT_LEEWAY)
+        return await self._store(db, self._token_key(claims["jti"]), expires_dt)
+
+    async def revoke_user(self, db: AsyncSession | Session, user_id: int) -> Tuple[Dict[str, Any], int]:
+        """
+        Revoke every access token of a user issued up to now.
+        """
+        # Any token issued before now has expired by then
+        expires_dt = datetime.now(timezone.utc) + timedelta(
+            minutes=settings.JWT_EXPIRY_MINUTES,
+            seconds=settings.JWT_LEEWAY
+        )
+        return await self._store(db, self._user_key(user_id), expires_dt)
+
+    async def sync(self) -> int:
+        """
+        Drop expired rows and rebuild the filter from the table.
+        """
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            recent, self._recent = self._recent, set()
+
+        async with session_scope() as db:
+            db_utils = AsyncDatabaseUtils(db)
+            await db_utils.db_execute(
+                delete(RevokedToken).where(RevokedToken.expires_dt <= now),
+                model_name="RevokedToken"
+            )
+            res, _ = await db_utils.db_all(use_primary(select(RevokedToken.key_digest)), model_name="RevokedToken")
+        if not res["success"]:
+            with self._lock:
+                self._recent |= recent
+            return -1
+
+        digests = [row.key_digest for row in res["data"]]
+        bloom = BloomFilter(max(self.capacity, 2 * len(digests)), self.error_rate)
+        for digest in digests:
+            bloom.add(digest)
+
+        with self._lock:
+            # Revocations committed while the table was being read
+            for digest in self._recent:
+                bloom.add(digest)
+            self._filter = bloom
+            self._checked.clear()
+        return len(digests)
+
+    async def run_sync_loop(self, interval: int) -> None:
+        """
+        Background task started from the app lifespan; cancelled on shutdown.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sync()
+            except Exception:
+                # Keep the current filter; the next tick retries
+                continue
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": self._filter.count,
+            "filter_bits": self._filter.size,
+            "filter_matches": self.filter_matches,
+            "db_checks": self.db_checks,
+            "rejected": self.rejected,
+        }
+
+
+revocation_list = RevocationList(
+    capacity=settings.REVOCATION_FILTER_CAPACITY,
+    error_rate=settings.REVOCATION_FILTER_ERROR_RATE
+)
@@ -1,27 +1,74 @@
-import bcrypt
-import hashlib, secrets
+import base64, hashlib, hmac, secrets, time
 from datetime import datetime, timedelta, timezone
 from core.config import settings
 
-def hash_password(password: str) -> str:
+def hash_password(password: str, rounds: int | None = None) -> str:
+    import bcrypt
     password_digest = hashlib.sha256(password.encode()).digest()
-    return bcrypt.hashpw(password_digest, bcrypt.gensalt()).decode()
+    return bcrypt.hashpw(password_digest, bcrypt.gensalt(rounds or settings.BCRYPT_ROUNDS)).decode()
 
 def verify_password(plain_pw: str, hashed_pw: str) -> bool:
+    import bcrypt
     password_digest = hashlib.sha256(plain_pw.encode()).digest()
     return bcrypt.checkpw(password_digest, hashed_pw.encode())
 
-def hash_token(token: str) -> str:
+def hash_token(token: str, rounds: int | None = None) -> str:
+    import bcrypt
     token_digest = hashlib.sha256(token.encode()).digest()
-    return bcrypt.hashpw(token_digest, bcrypt.gensalt()).decode()
+    return bcrypt.hashpw(token_digest, bcrypt.gensalt(rounds or settings.BCRYPT_ROUNDS)).decode()
 
 def verify_token_hash(token: str, hashed_token: str) -> bool:
+    import bcrypt
     token_digest = hashlib.sha256(token.encode()).digest()
     return bcrypt.checkpw(token_digest, hashed_token.encode())
 
+def hash_rounds(hashed: str) -> int | None:
+    # "$2b$12$<salt+hash>" -> 12
+    try:
+        return int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+def calibrate_rounds(target_ms: int, min_rounds: int, max_rounds: int) -> int:
+    """
+    Highest bcrypt cost in [min_rounds, max_rounds] hashing within target_ms on this machine.
+    Each extra round doubles the work, so one timing at min_rounds predicts the rest.
+    """
+    import bcrypt
+
+    digest = hashlib.sha256(b"calibration").digest()
+    salt = bcrypt.gensalt(min_rounds)
+    elapsed = min(_time_hashpw(digest, salt) for _ in range(3))
+
+    rounds = min_rounds
+    while rounds < max_rounds and elapsed * 2 <= target_ms / 1000:
+        rounds += 1
+        elapsed *= 2
+    return rounds
+
+def _time_hashpw(digest: bytes, salt: bytes) -> float:
+    import bcrypt
+    start = time.perf_counter()
+    bcrypt.hashpw(digest, salt)
+    return time.perf_counter() - start
+
 def sha256_hex(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
+# Derived key so token digests never share a key with JWT signing
+_TOKEN_DIGEST_KEY = sha256_hex(f"token-digest:{settings.SECRET_KEY}").encode()
+
+def token_digest(value: str) -> str:
+    return hmac.new(_TOKEN_DIGEST_KEY, value.encode("utf-8"), hashlib.sha256).hexdigest()
+
+def verify_token_digest(value: str, digest: str) -> bool:
+    return hmac.compare_digest(token_digest(value), digest)
+
+def rotated_jti(jti: str) -> str:
+    # Deterministic successor of a refresh jti: concurrent refreshes of one token agree on it
+    successor = hmac.new(_TOKEN_DIGEST_KEY, f"rotate:{jti}".encode("utf-8"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(successor).rstrip(b"=").decode()
+
 def new_raw_token() -> str:
     return secrets.token_urlsafe(settings.TOKEN_BYTES)
 
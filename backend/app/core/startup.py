@@ -0,0 +1,52 @@
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+"""
+Cold-start timing.
+
+The clock starts when this module is first imported, which main.py does
+before anything else. Phases (imports, settings, db_init, ...) are recorded
+as they finish (imports includes settings) and the summary is logged once
+the app is ready to serve.
+"""
+
+
+class StartupReport:
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        # Restart the clock, e.g. in a worker forked from an already started process
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.db_init_mode: str | None = None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def record(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def ready(self) -> None:
+        # Time to first request: everything from the first import to the end of the lifespan startup
+        self.record("total", self.elapsed())
+
+    def as_dict(self) -> Dict[str, float | str | None]:
+        report = {phase: round(seconds * 1000, 2) for phase, seconds in self.phases.items()}
+        return {"db_init_mode": self.db_init_mode, "ms": report}
+
+    def summary(self) -> str:
+        parts = " ".join(f"{phase}={seconds * 1000:.1f}ms" for phase, seconds in self.phases.items())
+        return f"Startup: {parts} (db_init_mode={self.db_init_mode})"
+
+
+startup_report = StartupReport()
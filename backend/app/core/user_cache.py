@@ -0,0 +1,231 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Set, Tuple
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList
+from core.config import settings
+from models import User
+
+"""
+Per-process cache of compact user records for the auth lookups.
+
+Records hold only what login and the legacy refresh paths read (id,
+username, email and the password/refresh hashes), indexed by id, username
+and email, with an LRU bound and a TTL.
+
+Writes through DatabaseUtils keep it current:
+- User objects flushed by a commit are written through with their new values
+- bulk UPDATE/DELETE statements on users invalidate the targeted id, or the
+  whole cache when the statement has no `users.id = ?` condition
+
+Every invalidation bumps `version`. A reader takes the version before its
+query and passes it to put(), so a row read before a concurrent write can
+never be cached after it. Other processes' writes are only seen once the
+entry expires, so USER_CACHE_TTL bounds the staleness across processes.
+"""
+
+_PENDING_KEY = "user_cache_pending"
+
+
+@dataclass(frozen=True, slots=True)
+class CachedUser:
+    id: int
+    username: str
+    email: str
+    hashed_pw: str
+    refresh_digest: str | None
+    refresh_hash: str | None
+    is_admin: bool | None
+
+
+# Columns selected for a CachedUser, in field order
+USER_RECORD_COLUMNS = (
+    User.id,
+    User.username,
+    User.email,
+    User.hashed_pw,
+    User.refresh_digest,
+    User.refresh_hash,
+    User.is_admin,
+)
+
+
+def user_record(row) -> CachedUser:
+    """
+    CachedUser from a row of USER_RECORD_COLUMNS or a User instance.
+    """
+    if isinstance(row, User):
+        return CachedUser(
+            row.id, row.username, row.email, row.hashed_pw, row.refresh_digest, row.refresh_hash, row.is_admin
+        )
+    return CachedUser(**row._mapping)
+
+
+def _target_user_id(stmt) -> Any:
+    # users.id = ? among the top-level AND conditions, else None (the statement may touch any row)
+    where = stmt.whereclause
+    if where is None:
+        return None
+
+    if isinstance(where, BooleanClauseList) and where.operator is operators.and_:
+        conditions = where.clauses
+    else:
+        conditions = [where]
+
+    for condition in conditions:
+        if (
+            isinstance(condition, BinaryExpression)
+            and condition.operator is operators.eq
+            and getattr(condition.left, "table", None) is User.__table__
+            and condition.left.key == "id"
+            and isinstance(condition.right, BindParameter)
+        ):
+            return condition.right.effective_value
+    return None
+
+
+class UserCache:
+    def __init__(self, capacity: int, ttl: int) -> None:
+        self.capacity = capacity
+        self.ttl = ttl
+        self._records: "OrderedDict[int, Tuple[CachedUser, float]]" = OrderedDict()
+        # username / email -> id
+        self._ids: Dict[str, int] = {}
+        self._lock = Lock()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0 and self.ttl > 0
+
+    def _fresh(self, user_id: int | None) -> CachedUser | None:
+        entry = self._records.get(user_id) if user_id is not None else None
+        if entry is None:
+            return None
+
+        record, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._drop(user_id)
+            return None
+
+        self._records.move_to_end(user_id)
+        return record
+
+    def _counted(self, record: CachedUser | None) -> CachedUser | None:
+        if record is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return record
+
+    def get_by_id(self, user_id: int) -> CachedUser | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            return self._counted(self._fresh(user_id))
+
+    def get_by_identifier(self, identifier: str) -> CachedUser | None:
+        """
+        Record whose username or email is identifier (the login lookup).
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            record = self._fresh(self._ids.get(identifier))
+            if record is not None and identifier not in (record.username, record.email):
+                # Index entry left behind by a username/email change
+                del self._ids[identifier]
+                record = None
+            return self._counted(record)
+
+    def put(self, record: CachedUser, version: int | None = None) -> None:
+        """
+        Cache a record read from the database; skipped if anything was invalidated
+        since `version` was taken (the row may predate that write).
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._drop(record.id)
+            self._records[record.id] = (record, time.monotonic() + self.ttl)
+            self._ids[record.username] = record.id
+            self._ids[record.email] = record.id
+            while len(self._records) > self.capacity:
+                self._drop(next(iter(self._records)))
+
+    def _drop(self, user_id: int) -> None:
+        entry = self._records.pop(user_id, None)
+        if entry is None:
+            return
+        for key in (entry[0].username, entry[0].email):
+            if self._ids.get(key) == user_id:
+                del self._ids[key]
+
+    def invalidate(self, user_ids: Iterable[int] | None = None) -> None:
+        """
+        Drop the given users, or everything when user_ids is None.
+        """
+        with self._lock:
+            self.version += 1
+            self.invalidations += 1
+            if user_ids is None:
+                self._records.clear()
+                self._ids.clear()
+                return
+            for user_id in user_ids:
+                self._drop(user_id)
+
+    # --- DatabaseUtils hooks
+
+    def note_statement(self, db, stmt) -> None:
+        """
+        Called before a bulk UPDATE/DELETE runs; invalidates now and again after the commit.
+        """
+        table = getattr(stmt, "table", None)
+        if getattr(table, "name", None) != User.__tablename__ or stmt.is_insert:
+            # New users replace nothing that could be cached
+            return
+
+        user_id = _target_user_id(stmt)
+        pending: Set[Any] = db.info.setdefault(_PENDING_KEY, set())
+        pending.add(user_id)
+        self.invalidate(None if user_id is None else [user_id])
+
+    def before_commit(self, db) -> Tuple[List[User], Set[Any]]:
+        written = [obj for obj in (*db.new, *db.dirty) if isinstance(obj, User)]
+        removed = {obj.id for obj in db.deleted if isinstance(obj, User)}
+        removed |= db.info.pop(_PENDING_KEY, set())
+        return written, removed
+
+    def after_commit(self, changes: Tuple[List[User], Set[Any]]) -> None:
+        written, removed = changes
+        if not written and not removed:
+            return
+
+        self.invalidate(None if None in removed else removed | {obj.id for obj in written})
+        # Write-through: the committed objects hold exactly what is now in the database
+        for obj in written:
+            self.put(user_record(obj))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._records),
+                "capacity": self.capacity,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+user_cache = UserCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
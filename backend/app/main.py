@@ -1,34 +1,104 @@
+# --- Startup clock (stdlib only), imported first so the import phase covers everything below
+from core.startup import startup_report
+
 # --- Third-party
 from fastapi import FastAPI
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
+import asyncio
+import logging
 
 # --- Local application imports
-from core.database import init_db
+from core.database import dispose_engines, init_db
+from core.admission import AdmissionMiddleware
+from core.audit import audit_log
+from core.breach import breached_passwords
 from core.config import settings
+from core.hashing import hasher
+from core.metrics import MetricsMiddleware
+from core.revocation import revocation_list
+from routers import metrics_router
 from routers.api_v1 import api_v1
+from routers.auth import audit_validation_error
+from services.session_service import SessionService
+
+startup_report.record("imports", startup_report.elapsed())
+logger = logging.getLogger("uvicorn.error")
 
 # Initialize database (SQLAlchemy engine & tables)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create tables on startup (safe if they already exist)
-    # Alembic handles actual schema migrations
-    init_db()
+    # Create tables on startup (safe if they already exist) unless DB_INIT_MODE
+    # says the schema is unchanged (fingerprint) or managed by Alembic (skip)
+    await init_db()
+    # Pick the bcrypt cost for this machine before serving logins
+    if settings.BCRYPT_TARGET_MS > 0:
+        with startup_report.phase("bcrypt_calibration"):
+            await hasher.calibrate(
+                settings.BCRYPT_TARGET_MS,
+                settings.BCRYPT_MIN_ROUNDS,
+                settings.BCRYPT_MAX_ROUNDS
+            )
+    # Map the breached-password index now, so a missing or bad file stops startup
+    with startup_report.phase("breached_passwords"):
+        breached_passwords.open()
+    # Periodically delete expired sessions in bounded batches
+    sweeper = None
+    if settings.SESSION_SWEEP_INTERVAL > 0:
+        sweeper = asyncio.create_task(
+            SessionService.run_sweeper(settings.SESSION_SWEEP_INTERVAL, settings.SESSION_SWEEP_BATCH)
+        )
+    # Load revoked access tokens, then keep the filter in step with other processes
+    with startup_report.phase("revocation_sync"):
+        await revocation_list.sync()
+    revocation_sync = asyncio.create_task(revocation_list.run_sync_loop(settings.REVOCATION_SYNC_INTERVAL))
+    # Batch authentication events into the audit trail off the request path
+    audit_writer = asyncio.create_task(audit_log.run_writer()) if audit_log.enabled else None
+    # Time to first request, also served under "startup" in /api/v1/health
+    startup_report.ready()
+    logger.info(startup_report.summary())
     yield
+    revocation_sync.cancel()
+    if sweeper is not None:
+        sweeper.cancel()
+    # Stop bcrypt worker processes
+    hasher.shutdown()
+    # Write the events still buffered before the process exits; after the hashing pool,
+    # so logins whose bcrypt job was still running have recorded theirs
+    if audit_writer is not None:
+        audit_log.stop()
+        await audit_writer
+    # Close pooled connections, after the audit writer's last insert
+    await dispose_engines()
 
 app = FastAPI(
     lifespan= lifespan,
     title= "AuthLogin API",
     version= "1.0.0",
+    # Render dict returns straight to bytes with orjson
+    default_response_class= ORJSONResponse,
 )
 
+# Sheds auth requests with a fast 503 once the bcrypt-heavy routes are saturated.
+# Added before CORS so it runs inside it and the 503s carry the CORS headers
+app.add_middleware(AdmissionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True, 
     allow_methods=["*"], 
-    allow_headers=["*"]
+    allow_headers=["*"],
+    # Lets browser clients read when to retry a shed request
+    expose_headers=["Retry-After"]
 )
 
+# Outermost, so the request timing includes the other middleware
+app.add_middleware(MetricsMiddleware)
+
 # Versioned API
-app.include_router(api_v1)
\ No newline at end of file
+app.include_router(api_v1)
+app.add_exception_handler(RequestValidationError, audit_validation_error)
+app.include_router(metrics_router)
\ No newline at end of file
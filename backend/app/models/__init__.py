@@ -1,3 +1,6 @@
 from .user import User
+from .session import UserSession
+from .revoked_token import RevokedToken
+from .audit_event import AuditEvent
 
-__all__ = ["User"]
\ No newline at end of file
+__all__ = ["User", "UserSession", "RevokedToken", "AuditEvent"]
\ No newline at end of file
@@ -0,0 +1,21 @@
+from sqlalchemy import Boolean, Column, DateTime, Integer, String
+from core.database import Base
+
+class AuditEvent(Base):
+    """
+    Append-only trail of authentication events, written in batches by core.audit.
+    user_id is not a foreign key: the trail outlives the users it mentions.
+    """
+    __tablename__ = "audit_events"
+
+    id = Column(Integer, primary_key=True)
+
+    event = Column(String(20), nullable=False)
+    success = Column(Boolean, nullable=False)
+    status = Column(Integer, nullable=False)
+    user_id = Column(Integer, index=True, nullable=True)
+    identifier = Column(String(255), nullable=True)
+    ip = Column(String(45), nullable=True)
+    user_agent = Column(String(150), nullable=True)
+
+    occurred_dt = Column(DateTime(timezone=True), index=True, nullable=False)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, DateTime
+from datetime import datetime, timezone
+from core.database import Base
+
+class RevokedToken(Base):
+    """
+    Access tokens revoked before their exp, keyed by the digest of their jti.
+    Rows are useless once expires_dt (the token's own exp) has passed and are deleted then.
+    """
+    __tablename__ = "revoked_tokens"
+
+    key_digest = Column(String(64), primary_key=True)
+
+    revoked_dt = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    expires_dt = Column(DateTime(timezone=True), index=True, nullable=False)
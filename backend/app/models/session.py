@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from datetime import datetime, timezone
+from core.database import Base
+
+class UserSession(Base):
+    """
+    One row per signed-in device, identified by the keyed digest of its refresh token's jti.
+    """
+    __tablename__ = "user_sessions"
+
+    id = Column(Integer, primary_key=True)
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    refresh_digest = Column(String(64), unique=True, index=True, nullable=False)
+    device = Column(String(150), nullable=True)
+
+    created_dt = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    last_used_dt = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    expires_dt = Column(DateTime(timezone=True), index=True, nullable=False)
+    # When refresh_digest last changed; bounds the refresh grace window
+    rotated_dt = Column(DateTime(timezone=True), nullable=True)
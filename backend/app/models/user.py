@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime
+from sqlalchemy import Boolean, Column, String, Integer, DateTime
 from sqlalchemy.orm import DeclarativeBase
 from datetime import datetime, timezone
 from core.database import Base
@@ -14,7 +14,10 @@ class User(Base):
     email = Column(String(150), unique=True, index=True, nullable=False)
     phone_num = Column(String(64), nullable=False)
     hashed_pw = Column(String(256), nullable=False)
-    refresh_hash = Column(String(256), nullable=True)
+    refresh_hash = Column(String(256), nullable=True)  # Legacy bcrypt hash, cleared on next rotation
+    refresh_digest = Column(String(64), unique=True, index=True, nullable=True)
+    # Granted only with tools.admins, never through the API; NULL = not an admin
+    is_admin = Column(Boolean, nullable=True)
 
     created_dt = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
     updated_dt = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
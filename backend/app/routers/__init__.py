@@ -1 +1,5 @@
-from .auth import router as auth_router
\ No newline at end of file
+from .auth import router as auth_router
+from .health import router as health_router
+from .well_known import router as well_known_router
+from .metrics import router as metrics_router
+from .users import router as users_router
\ No newline at end of file
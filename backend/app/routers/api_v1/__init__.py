@@ -4,6 +4,12 @@ api_v1 = APIRouter(prefix="/api/v1")
 
 # Import sub-router
 from routers.auth import router as auth_router
+from routers.health import router as health_router
+from routers.well_known import router as well_known_router
+from routers.users import router as users_router
 
 # Mount sub-router under /api/v1/*
-api_v1.include_router(auth_router, tags=["auth"])
\ No newline at end of file
+api_v1.include_router(auth_router, tags=["auth"])
+api_v1.include_router(health_router, tags=["health"])
+api_v1.include_router(well_known_router, tags=["keys"])
+api_v1.include_router(users_router, tags=["users"])
\ No newline at end of file
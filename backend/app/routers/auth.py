@@ -1,11 +1,26 @@
-from fastapi import APIRouter, Depends, Response, Request
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from core.database import get_db
-from core.dependencies import get_current_user_id
-from schemas.auth import LoginRequest
-from schemas.user import UserCreate
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.audit import audit_log
+from core.database import get_session
+from core.dependencies import get_current_user_id, require_introspection_key
+from core.rate_limit import enforce_login_rate_limit, login_limiter
+from core.token_cache import token_cache
+from schemas.auth import (
+    ErrorResponse,
+    IntrospectRequest,
+    IntrospectResponse,
+    LoginRequest,
+    LoginResponse,
+    LogoutAllResponse,
+    MessageResponse,
+    RefreshResponse,
+)
+from schemas.user import RegisterResponse, UserCreate
 from services.auth_service import AuthService
 from services.user_service import UserService
 
@@ -22,121 +37,198 @@ COOKIE_SETTINGS = {
     "path": "/"
 }
 
-@router.post("/register")
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
-    result, status = UserService.create_user(db, user_data)
-    return JSONResponse(content=result, status_code=status)
+# Handlers return ORJSONResponse directly: the response models below only document the
+# bodies, so FastAPI never re-validates or re-encodes what the services built
+ERROR_RESPONSES = {
+    400: {"model": ErrorResponse},
+    401: {"model": ErrorResponse},
+    500: {"model": ErrorResponse},
+}
 
-@router.post("/login")
-def login(response: Response, credentials: LoginRequest, db: Session = Depends(get_db)):
-    result, status = AuthService.login(db, credentials)
+def _auth_response(result: dict, status: int) -> ORJSONResponse:
+    """
+    Move the tokens of a successful login/refresh out of the body and into HTTP-only cookies.
+    """
+    # The service built this dict for us, so pop in place instead of copying it
+    access_token = result.pop("access_token")
+    refresh_token = result.pop("refresh_token")
 
-    # If login successful, set HTTP-only cookies
-    if result.get("success") and "access_token" in result:
-        # Set access token cookie
-        response.set_cookie(
-            key="access_token",
-            value=result["access_token"],
-            max_age=result["expires_in"],
-            **COOKIE_SETTINGS
-        )
+    response = ORJSONResponse(content=result, status_code=status)
 
-        # Set refresh token cookie with longer expiry
-        response.set_cookie(
-            key="refresh_token",
-            value=result["refresh_token"],
-            max_age=7 * 24 * 60 * 60,  # 7 days
-            **COOKIE_SETTINGS
-        )
+    # Set access token cookie
+    response.set_cookie(
+        key="access_token",
+        value=access_token,
+        max_age=result["expires_in"],
+        **COOKIE_SETTINGS
+    )
 
-        # Remove tokens from response body for security
-        response_data = result.copy()
-        response_data.pop("access_token", None)
-        response_data.pop("refresh_token", None)
+    # Set refresh token cookie with longer expiry
+    response.set_cookie(
+        key="refresh_token",
+        value=refresh_token,
+        max_age=7 * 24 * 60 * 60,  # 7 days
+        **COOKIE_SETTINGS
+    )
+    return response
 
-        # Set status code and return data
-        response.status_code = status
-        return response_data
+def _clear_auth_cookies(response: ORJSONResponse) -> ORJSONResponse:
+    # Clear HTTP-only cookies with all the same settings they were set with
+    response.delete_cookie(
+        key="access_token",
+        **COOKIE_SETTINGS
+    )
+    response.delete_cookie(
+        key="refresh_token",
+        **COOKIE_SETTINGS
+    )
+    return response
 
-    response.status_code = status
-    return result
+@router.post("/register", response_model=RegisterResponse, responses=ERROR_RESPONSES)
+async def register(
+    request: Request,
+    user_data: UserCreate,
+    db: AsyncSession | Session = Depends(get_session)
+):
+    result, status = await UserService.create_user(db, user_data)
+    audit_log.record(
+        "register", status, request,
+        user_id=result["data"]["id"] if result.get("success") else None,
+        identifier=user_data.username
+    )
+    return ORJSONResponse(content=result, status_code=status)
 
-@router.post("/refresh")
-def refresh(
+@router.post("/login", response_model=LoginResponse, responses={**ERROR_RESPONSES, 429: {"model": ErrorResponse}})
+async def login(
     request: Request,
-    response: Response,
-    db: Session = Depends(get_db)
+    credentials: LoginRequest,
+    db: AsyncSession | Session = Depends(get_session)
+):
+    # Throttle before the user lookup and bcrypt; raises 429 with Retry-After
+    try:
+        await enforce_login_rate_limit(request, credentials.identifier)
+    except HTTPException as exc:
+        audit_log.record("login", exc.status_code, request, identifier=credentials.identifier)
+        raise
+
+    device = credentials.device or request.headers.get("user-agent")
+    result, status = await AuthService.login(db, credentials, device=device)
+    audit_log.record(
+        "login", status, request,
+        user_id=result["data"]["user_id"] if result.get("success") else None,
+        identifier=credentials.identifier
+    )
+
+    # If login successful, set HTTP-only cookies
+    client_ip = request.client.host if request.client else None
+    if result.get("success") and "access_token" in result:
+        await login_limiter.succeeded(client_ip, credentials.identifier)
+        return _auth_response(result, status)
+
+    if status == 401:
+        await login_limiter.failed(client_ip, credentials.identifier)
+
+    return ORJSONResponse(content=result, status_code=status)
+
+@router.post("/refresh", response_model=RefreshResponse, responses=ERROR_RESPONSES)
+async def refresh(
+    request: Request,
+    db: AsyncSession | Session = Depends(get_session)
 ):
     # Get refresh token from HTTP-only cookie
     token = request.cookies.get("refresh_token")
 
     if not token:
-        response.status_code = 401
-        return {"success": False, "error": "Refresh token required"}
+        audit_log.record("refresh", 401, request)
+        return ORJSONResponse(content={"success": False, "error": "Refresh token required"}, status_code=401)
 
-    result, status = AuthService.refresh_token(token, db)
+    result, status = await AuthService.refresh_token(token, db)
+    audit_log.record("refresh", status, request, user_id=result.pop("user_id", None))
 
     # If refresh successful, set new HTTP-only cookies
     if result.get("success") and "access_token" in result:
-        # Set new access token cookie
-        response.set_cookie(
-            key="access_token",
-            value=result["access_token"],
-            max_age=result["expires_in"],
-            **COOKIE_SETTINGS
-        )
-
-        # Set new refresh token cookie
-        response.set_cookie(
-            key="refresh_token",
-            value=result["refresh_token"],
-            max_age=7 * 24 * 60 * 60,  # 7 days
-            **COOKIE_SETTINGS
-        )
-
-        # Remove tokens from response body for security
-        response_data = result.copy()
-        response_data.pop("access_token", None)
-        response_data.pop("refresh_token", None)
+        return _auth_response(result, status)
 
-        # Set status code and return data
-        response.status_code = status
-        return response_data
+    return ORJSONResponse(content=result, status_code=status)
 
-    response.status_code = status
-    return result
-
-@router.post("/logout")
-def logout(
+@router.post("/logout", response_model=MessageResponse, responses=ERROR_RESPONSES)
+async def logout(
     request: Request,
-    response: Response,
-    db: Session = Depends(get_db)
+    db: AsyncSession | Session = Depends(get_session)
 ):
     # Try to get user_id from token, but don't fail if token is expired
     user_id = None
+    access_claims = None
     token = request.cookies.get("access_token")
     if token:
         token_data = AuthService.validate_token(token)
         if token_data.get("success") and token_data.get("data", {}).get("type") == "access":
-            user_id = int(token_data["data"]["sub"])
+            access_claims = token_data["data"]
+            user_id = int(access_claims["sub"])
 
-    # Call logout service if we have a valid user_id
+    # Call logout service if we have a valid user_id; ends this device's session only
     if user_id:
-        result, status = AuthService.logout(db, user_id)
+        result, status = await AuthService.logout(
+            db,
+            user_id,
+            refresh_token=request.cookies.get("refresh_token"),
+            access_claims=access_claims
+        )
     else:
         # Even if token is invalid, still clear cookies
         result = {"success": True, "message": "Logged out successfully"}
         status = 200
 
-    # Clear HTTP-only cookies with all the same settings they were set with
-    response.delete_cookie(
-        key="access_token",
-        **COOKIE_SETTINGS
-    )
-    response.delete_cookie(
-        key="refresh_token",
-        **COOKIE_SETTINGS
-    )
+    # Never serve this access token from the verified-claims cache again
+    if token:
+        token_cache.discard(token)
+
+    audit_log.record("logout", status, request, user_id=user_id)
+
+    return _clear_auth_cookies(ORJSONResponse(content=result, status_code=status))
+
+@router.post("/logout-all", response_model=LogoutAllResponse, responses=ERROR_RESPONSES)
+async def logout_all(
+    request: Request,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession | Session = Depends(get_session)
+):
+    # Revoke every session of the user, then clear this device's cookies
+    result, status = await AuthService.logout_all(db, user_id)
+    audit_log.record("logout_all", status, request, user_id=user_id)
+
+    token = request.cookies.get("access_token")
+    if token:
+        token_cache.discard(token)
+
+    return _clear_auth_cookies(ORJSONResponse(content=result, status_code=status))
+
+@router.post(
+    "/introspect",
+    response_model=IntrospectResponse,
+    responses={**ERROR_RESPONSES, 403: {"model": ErrorResponse}},
+    dependencies=[Depends(require_introspection_key)]
+)
+async def introspect(body: IntrospectRequest):
+    # One call verifies a whole batch of access tokens for an API gateway
+    result, status = await AuthService.introspect(body.tokens, compact=body.claims == "compact")
+    return ORJSONResponse(content=result, status_code=status)
+
+# Register and login requests rejected by schema validation (weak or breached
+# password, malformed identifier) never reach the handlers above.
+# Endpoint -> (audit event, body field recorded as the identifier)
+VALIDATION_AUDITED = {
+    register: ("register", "username"),
+    login: ("login", "identifier"),
+}
 
-    response.status_code = status
-    return result
\ No newline at end of file
+async def audit_validation_error(request: Request, exc: RequestValidationError):
+    """
+    422 handler: audits rejected register/login attempts, then answers like FastAPI's default handler.
+    """
+    audited = VALIDATION_AUDITED.get(request.scope.get("endpoint"))
+    if audited is not None:
+        event, field = audited
+        identifier = exc.body.get(field) if isinstance(exc.body, dict) else None
+        audit_log.record(event, 422, request, identifier=identifier if isinstance(identifier, str) else None)
+    return await request_validation_exception_handler(request, exc)
\ No newline at end of file
@@ -0,0 +1,32 @@
+from fastapi import APIRouter
+from core.admission import admission
+from core.audit import audit_log
+from core.breach import breached_passwords
+from core.database import get_pool_stats
+from core.hashing import hasher
+from core.rate_limit import login_limiter
+from core.revocation import revocation_list
+from core.startup import startup_report
+from core.token_cache import token_cache
+from core.user_cache import user_cache
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+@router.get("")
+async def health():
+    # Runtime statistics for monitoring
+    return {
+        "success": True,
+        "data": {
+            "database": get_pool_stats(),
+            "token_cache": token_cache.stats(),
+            "user_cache": user_cache.stats(),
+            "bcrypt_rounds": hasher.rounds,
+            "login_rate_limit": login_limiter.stats(),
+            "revocation": revocation_list.stats(),
+            "breached_passwords": breached_passwords.stats(),
+            "audit": audit_log.stats(),
+            "admission": admission.stats(),
+            "startup": startup_report.as_dict(),
+        }
+    }
@@ -0,0 +1,36 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from core.admission import admission
+from core.database import get_pool_stats
+from core.metrics import registry
+from core.token_cache import token_cache
+from core.user_cache import user_cache
+
+# Served at the root (/metrics) where Prometheus scrapes by default
+router = APIRouter(tags=["metrics"])
+
+def _runtime_gauges():
+    # Same numbers as /api/v1/health, read at scrape time
+    pool = get_pool_stats()
+    yield "authlogin_db_pool", "Database pool gauges and counters", {
+        f'stat="{key}"': value for key, value in pool.items() if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+    cache = token_cache.stats()
+    yield "authlogin_token_cache", "Verified access-token cache statistics", {
+        f'stat="{key}"': value for key, value in cache.items()
+    }
+    users = user_cache.stats()
+    yield "authlogin_user_cache", "User lookup cache statistics", {
+        f'stat="{key}"': value for key, value in users.items()
+    }
+    yield "authlogin_admission", "Auth admission control: running and queued requests, shed counts per route", {
+        f'route="{route}",stat="{key}"': value
+        for route, counters in admission.stats()["routes"].items()
+        for key, value in counters.items()
+    }
+
+registry.register_collector(_runtime_gauges)
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,79 @@
+from datetime import datetime, timezone
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import get_session
+from core.dependencies import get_current_admin_id
+from models import User
+from services.user_service import USER_FIELDS, UserService
+
+router = APIRouter(prefix="/users", tags=["users"], dependencies=[Depends(get_current_admin_id)])
+
+def _utc(value: datetime) -> datetime:
+    # Timestamps are stored in UTC; naive query values are taken as UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def user_filters(
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    updated_after: datetime | None = None,
+    updated_before: datetime | None = None,
+) -> List:
+    bounds = [
+        (User.created_dt, ">=", created_after),
+        (User.created_dt, "<", created_before),
+        (User.updated_dt, ">=", updated_after),
+        (User.updated_dt, "<", updated_before),
+    ]
+    return [
+        column >= _utc(value) if op == ">=" else column < _utc(value)
+        for column, op, value in bounds
+        if value is not None
+    ]
+
+def parse_fields(fields: str | None) -> tuple | ORJSONResponse:
+    if not fields:
+        return USER_FIELDS
+
+    requested = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in requested if name not in USER_FIELDS]
+    if unknown or not requested:
+        return ORJSONResponse(
+            content={"success": False, "error": f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(USER_FIELDS)}"},
+            status_code=400
+        )
+    return requested
+
+@router.get("")
+async def list_users(
+    after_id: int = Query(0, ge=0, description="Cursor: the next_cursor of the previous page"),
+    limit: int = Query(50, ge=1, le=1000),
+    fields: str | None = Query(None, description="Comma-separated subset of the user fields"),
+    conditions: List = Depends(user_filters),
+    db: AsyncSession | Session = Depends(get_session)
+):
+    selected = parse_fields(fields)
+    if isinstance(selected, ORJSONResponse):
+        return selected
+
+    result, status = await UserService.list_users(db, after_id, limit, selected, conditions)
+    return ORJSONResponse(content=result, status_code=status)
+
+@router.get("/export")
+async def export_users(
+    fields: str | None = Query(None, description="Comma-separated subset of the user fields"),
+    conditions: List = Depends(user_filters)
+):
+    selected = parse_fields(fields)
+    if isinstance(selected, ORJSONResponse):
+        return selected
+
+    return StreamingResponse(
+        UserService.export_ndjson(selected, conditions),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="users.ndjson"'}
+    )
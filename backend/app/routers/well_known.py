@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Request, Response
+from core.config import settings
+from core.keys import keyring
+
+router = APIRouter(prefix="/.well-known", tags=["keys"])
+
+@router.get("/jwks.json")
+async def jwks(request: Request):
+    # Public signing keys for offline token verification by other services
+    headers = {
+        "ETag": keyring.jwks_etag,
+        "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE}",
+    }
+
+    if request.headers.get("if-none-match") == keyring.jwks_etag:
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=keyring.jwks_body, media_type="application/json", headers=headers)
@@ -1,5 +1,55 @@
-from pydantic import BaseModel
+from typing import Any, Dict, List, Literal
+from pydantic import BaseModel, Field
+from core.config import settings
 
 class LoginRequest(BaseModel):
-    identifier: str
+    identifier: str = Field(max_length=150)  # Username or email; both columns are String(150)
     password: str
+    device: str | None = None  # Label shown for this session; defaults to the User-Agent
+
+
+class AuthUser(BaseModel):
+    user_id: int
+    username: str
+    email: str
+
+class LoginResponse(BaseModel):
+    success: bool
+    message: str
+    token_type: str
+    expires_in: int
+    data: AuthUser
+
+class RefreshResponse(BaseModel):
+    success: bool
+    token_type: str
+    expires_in: int
+
+class MessageResponse(BaseModel):
+    success: bool
+    message: str
+
+class LogoutAllData(BaseModel):
+    sessions_revoked: int
+
+class LogoutAllResponse(MessageResponse):
+    data: LogoutAllData
+
+class IntrospectRequest(BaseModel):
+    tokens: List[str] = Field(min_length=1, max_length=settings.INTROSPECT_MAX_TOKENS)
+    claims: Literal["full", "compact"] = "full"  # compact: sub, username and exp only
+
+class TokenIntrospection(BaseModel):
+    active: bool
+    ttl: int | None = None  # Seconds until exp, for active tokens
+    claims: Dict[str, Any] | None = None
+    error: str | None = None  # Why an inactive token was rejected
+
+class IntrospectResponse(BaseModel):
+    success: bool
+    data: List[TokenIntrospection]  # Same order as the request's tokens
+
+class ErrorResponse(BaseModel):
+    success: bool
+    error: str | None = None
+    errors: list[str] | None = None  # Registration conflicts
@@ -1,6 +1,44 @@
 from pydantic import BaseModel, EmailStr, field_validator
 from datetime import datetime
-import re
+from core.breach import breached_passwords
+
+SPECIAL_CHARS = frozenset("!@#$%^&*")
+
+def password_policy_errors(v: str) -> list[str]:
+    """
+    Check every password rule in one pass over the characters.
+    """
+    upper = lower = special = whitespace = False
+    digits = 0
+
+    for ch in v:
+        if "A" <= ch <= "Z":
+            upper = True
+        elif "a" <= ch <= "z":
+            lower = True
+        elif ch.isdecimal():
+            digits += 1
+        elif ch in SPECIAL_CHARS:
+            special = True
+        elif ch.isspace():
+            whitespace = True
+
+    errors = []
+
+    if len(v) < 12:
+        errors.append("Password must be at least 12 characters.")
+    if not upper:
+        errors.append("Must include at least 1 upper case letter.")
+    if not lower:
+        errors.append("Must include at least 1 lower case letter.")
+    if not special:
+        errors.append("Must include at least 1 special character (!@#$%^&*).")
+    if digits < 2:
+        errors.append("Must include at least 2 numbers.")
+    if whitespace:
+        errors.append("Password must not contain whitespace.")
+
+    return errors
 
 class UserCreate(BaseModel):
     username: str
@@ -13,20 +51,11 @@ class UserCreate(BaseModel):
     @field_validator('password')
     @classmethod
     def validate_password(cls, v):
-        errors = []
-
-        if len(v) < 12:
-            errors.append("Password must be at least 12 characters.")
-        if not re.search(r'[A-Z]', v):
-            errors.append("Must include at least 1 upper case letter.")
-        if not re.search(r'[a-z]', v):
-            errors.append("Must include at least 1 lower case letter.")
-        if not re.search(r'[!@#$%^&*]', v):
-            errors.append("Must include at least 1 special character (!@#$%^&*).")
-        if len(re.findall(r'\d', v)) < 2:
-            errors.append("Must include at least 2 numbers.")
-        if re.search(r'\s', v):
-            errors.append("Password must not contain whitespace.")
+        errors = password_policy_errors(v)
+
+        # Only passwords that pass the rules are worth a lookup
+        if not errors and breached_passwords.contains(v):
+            errors.append("This password has appeared in a data breach; choose a different one.")
 
         if errors:
             raise ValueError("\n".join(errors))  # Join with newlines instead of list
@@ -45,3 +74,7 @@ class UserCreateResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+class RegisterResponse(BaseModel):
+    success: bool
+    data: UserCreateResponse
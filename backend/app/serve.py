@@ -0,0 +1,285 @@
+import asyncio
+import logging
+import logging.config
+import os
+import random
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List
+
+import uvicorn
+from uvicorn.config import LOGGING_CONFIG
+
+"""
+Pre-forking server entrypoint.
+
+    python serve.py        # from backend/app; POSIX only (uses fork)
+
+The master imports main.app once, prepares the schema, binds the listening
+socket and forks SERVE_WORKERS uvicorn workers that share it. Each worker
+resets the inherited SQLAlchemy pool and starts its own bcrypt pool, sized so
+that all workers together use one hashing process per core.
+
+Workers are recycled after SERVE_MAX_REQUESTS requests (plus jitter, so they
+do not all restart at once) or once their RSS exceeds SERVE_MAX_MEMORY_MB.
+A replacement is forked before the old worker is told to stop, and stopping
+workers finish their in-flight requests (up to SERVE_GRACEFUL_TIMEOUT) while
+the others keep accepting on the shared socket.
+
+Signals to the master:
+- SIGHUP: graceful reload, a new set of workers replaces the current one
+- SIGTERM / SIGINT: graceful shutdown
+
+The app is preloaded, so a reload gives fresh workers (pools, memory, cached
+state) but not new code or settings; restart the master for those.
+"""
+
+logger = logging.getLogger("uvicorn.error")
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _bind(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _rss_mb(pid: int) -> float | None:
+    # Resident set size from /proc (Linux); other platforms skip the memory check
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE / (1024 * 1024)
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class Master:
+    def __init__(self, app, settings) -> None:
+        self.app = app
+        self.settings = settings
+        self.workers_count = settings.SERVE_WORKERS if settings.SERVE_WORKERS > 0 else (os.cpu_count() or 1)
+        self.sock = _bind(settings.SERVE_HOST, settings.SERVE_PORT, settings.SERVE_BACKLOG)
+        # pid -> fork time of the workers serving now; retiring ones are only reaped
+        self.workers: Dict[int, float] = {}
+        self.retiring: Dict[int, float] = {}
+        self._signals: List[int] = []
+        self._stopping = False
+
+    # --- worker side
+
+    def _worker_config(self) -> uvicorn.Config:
+        max_requests = None
+        if self.settings.SERVE_MAX_REQUESTS > 0:
+            max_requests = self.settings.SERVE_MAX_REQUESTS + random.randint(0, self.settings.SERVE_MAX_REQUESTS_JITTER)
+
+        return uvicorn.Config(
+            self.app,
+            lifespan="on",
+            timeout_keep_alive=self.settings.SERVE_KEEPALIVE,
+            timeout_graceful_shutdown=self.settings.SERVE_GRACEFUL_TIMEOUT,
+            limit_max_requests=max_requests,
+            # Logging was configured by the master and is inherited
+            log_config=None,
+        )
+
+    def _run_worker(self) -> None:
+        from core.database import replica_sync_engines, sync_engine
+        from core.hashing import hasher
+        from core.startup import startup_report
+
+        # Drop the master's handlers: terminal hangups go to the master, which reloads,
+        # and SIGTERM/SIGINT stop this worker (gracefully once uvicorn is serving)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+        # Connections opened before the fork belong to the master; never reuse them here
+        for inherited in (sync_engine, *replica_sync_engines):
+            inherited.dispose(close=False)
+
+        # The master logged the import and schema timings; report this worker from its fork
+        startup_report.reset()
+
+        # One bcrypt process per core across all workers, unless configured explicitly
+        if self.settings.HASH_POOL_WORKERS <= 0:
+            hasher.workers = max(1, (os.cpu_count() or 1) // self.workers_count)
+            if self.settings.HASH_QUEUE_SIZE <= 0:
+                hasher.queue_size = hasher.workers * 4
+
+        uvicorn.Server(self._worker_config()).run(sockets=[self.sock])
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._run_worker()
+            except BaseException:
+                logger.exception("Worker %d crashed", os.getpid())
+                code = 1
+            finally:
+                # Skip the master's atexit handlers and buffered state
+                os._exit(code)
+
+        self.workers[pid] = time.monotonic()
+        logger.info("Booted worker %d", pid)
+        return pid
+
+    def retire(self, pid: int, reason: str) -> None:
+        # Replacement first, so capacity never dips while the old worker drains
+        self.workers.pop(pid, None)
+        if not self._stopping:
+            self.spawn()
+        logger.info("Retiring worker %d (%s)", pid, reason)
+        self.retiring[pid] = time.monotonic()
+        self._kill(pid, signal.SIGTERM)
+
+    # --- master side
+
+    def _on_signal(self, signum, frame) -> None:
+        self._signals.append(signum)
+
+    @staticmethod
+    def _kill(pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            self.retiring.pop(pid, None)
+            started = self.workers.pop(pid, None)
+            if started is None or self._stopping:
+                continue
+
+            # Exited on its own: request limit reached, or a crash
+            code = os.waitstatus_to_exitcode(status)
+            logger.info("Worker %d exited with %d", pid, code)
+            if code not in (0, -signal.SIGTERM) and time.monotonic() - started < 1:
+                # Failing at boot; do not fork in a tight loop
+                time.sleep(1)
+            self.spawn()
+
+    def _check_memory(self) -> None:
+        limit = self.settings.SERVE_MAX_MEMORY_MB
+        if limit <= 0:
+            return
+        for pid in list(self.workers):
+            rss = _rss_mb(pid)
+            if rss is not None and rss > limit:
+                self.retire(pid, f"rss {rss:.0f}MB > {limit}MB")
+
+    def _kill_stragglers(self) -> None:
+        # Retiring workers get the graceful timeout plus a margin, then SIGKILL
+        deadline = self.settings.SERVE_GRACEFUL_TIMEOUT + 5
+        now = time.monotonic()
+        for pid, since in self.retiring.items():
+            if now - since > deadline:
+                self._kill(pid, signal.SIGKILL)
+
+    def reload(self) -> None:
+        logger.info("Reloading: replacing %d workers", len(self.workers))
+        for pid in list(self.workers):
+            self.retire(pid, "reload")
+
+    def shutdown(self) -> None:
+        self._stopping = True
+        logger.info("Shutting down: waiting for in-flight requests")
+        for pid in list(self.workers):
+            self.retiring[pid] = time.monotonic()
+            self._kill(pid, signal.SIGTERM)
+        self.workers.clear()
+
+        while self.retiring:
+            self._reap()
+            self._kill_stragglers()
+            time.sleep(0.1)
+        self.sock.close()
+
+    def run(self) -> None:
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self._on_signal)
+
+        logger.info(
+            "Listening on %s:%d with %d workers (master %d)",
+            self.settings.SERVE_HOST, self.settings.SERVE_PORT, self.workers_count, os.getpid()
+        )
+        for _ in range(self.workers_count):
+            self.spawn()
+
+        while True:
+            while self._signals:
+                signum = self._signals.pop(0)
+                if signum in (signal.SIGTERM, signal.SIGINT):
+                    self.shutdown()
+                    return
+                if signum == signal.SIGHUP:
+                    self.reload()
+            self._reap()
+            self._check_memory()
+            self._kill_stragglers()
+            time.sleep(0.5)
+
+
+async def _prepare() -> None:
+    """
+    One-time startup work done by the master instead of by every worker.
+    """
+    from core.config import settings
+    from core.database import dispose_engines, init_db
+    from core.hashing import hasher
+    from core.security import calibrate_rounds
+    from core.startup import startup_report
+
+    # Workers run the app lifespan too; the schema is ready by the time they fork
+    await init_db()
+    settings.DB_INIT_MODE = "skip"
+
+    # Calibrate in-process: the master has no hashing pool to hand down to workers
+    if settings.BCRYPT_TARGET_MS > 0:
+        with startup_report.phase("bcrypt_calibration"):
+            hasher.rounds = calibrate_rounds(
+                settings.BCRYPT_TARGET_MS,
+                settings.BCRYPT_MIN_ROUNDS,
+                settings.BCRYPT_MAX_ROUNDS
+            )
+        settings.BCRYPT_TARGET_MS = 0
+
+    # No connection may be shared with the forked workers
+    await dispose_engines()
+
+    startup_report.ready()
+    logger.info("Master %s", startup_report.summary())
+
+
+def main() -> None:
+    if not hasattr(os, "fork"):
+        sys.exit("serve.py needs os.fork; run `uvicorn main:app` on this platform")
+
+    logging.config.dictConfig(LOGGING_CONFIG)
+
+    # Preload: every worker is forked with the app already imported
+    from main import app
+    from core.config import settings
+
+    asyncio.run(_prepare())
+    Master(app, settings).run()
+
+
+if __name__ == "__main__":
+    main()
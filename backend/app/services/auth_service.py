@@ -1,17 +1,30 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, select, update
 import jwt
 from jwt.exceptions import ExpiredSignatureError, InvalidTokenError
-from typing import Dict, Tuple, Any
+from typing import Dict, List, Tuple, Any
 from datetime import datetime, timedelta, timezone
 from models import User
 from schemas.auth import LoginRequest
 from core.config import settings
-from core.db_utils import DatabaseUtils
-from core.security import verify_password, hash_token, verify_token_hash
+from core.database import HAS_REPLICAS, use_primary
+from core.db_utils import AsyncDatabaseUtils
+from core.hashing import hasher
+from core.keys import keyring
+from core.metrics import timed
+from core.revocation import revocation_list
+from core.security import new_raw_token, rotated_jti, token_digest, verify_token_digest
+from core.token_cache import token_cache
+from core.user_cache import USER_RECORD_COLUMNS, user_cache, user_record
+from services.session_service import SessionService
+
+# Claims returned by introspection when the caller asks for the compact set
+COMPACT_CLAIMS = ("sub", "username", "exp")
 
 class AuthService:
     @staticmethod
+    @timed("jwt_encode")
     def generate_token(data: dict, expires_delta: timedelta | None = None) -> str:
         """
         Generate a JWT token
@@ -23,11 +36,18 @@ class AuthService:
         expire = now + (expires_delta if expires_delta else timedelta(minutes=settings.JWT_EXPIRY_MINUTES))
         # Add expiration and issue time to payload
         to_encode.update({"exp": expire, "iat": now})
-        # Encode the payload with the secret key and algorithm
-        encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        # Encode the payload with the active signing key, tagged with its kid
+        signer = keyring.active
+        encoded_jwt = jwt.encode(
+            to_encode,
+            signer.signing_key,
+            algorithm=signer.algorithm,
+            headers={"kid": signer.kid} if signer.kid else None
+        )
         return encoded_jwt
     
     @staticmethod
+    @timed("jwt_validate")
     def validate_token(token: str) -> Dict[str, Any]:
         """
         Validate a JWT token
@@ -38,14 +58,30 @@ class AuthService:
         Returns:
             Dict[str, Any] - The decoded token data
         """
+        # Serve repeat access tokens from the verified-claims cache
+        cached_claims = token_cache.get(token)
+        if cached_claims is not None:
+            return {
+                "success": True,
+                "data": cached_claims
+            }
+
         # Validate token
         try:
+            # Pick the verification key by kid; its algorithm is the only one accepted
+            verifier = keyring.verification_key(jwt.get_unverified_header(token).get("kid"))
+            if verifier is None:
+                raise InvalidTokenError("Unknown signing key")
+
             decoded_token = jwt.decode(
                 token,
-                settings.SECRET_KEY,
-                algorithms=[settings.ALGORITHM],
+                verifier.verifying_key,
+                algorithms=[verifier.algorithm],
                 leeway=settings.JWT_LEEWAY
             )
+            # Refresh tokens are single-use, so only access tokens are worth caching
+            if decoded_token.get("type") == "access":
+                token_cache.put(token, decoded_token)
             return {
                 "success": True,
                 "data": decoded_token
@@ -63,6 +99,65 @@ class AuthService:
                 "error": "Invalid Token"
             }
         
+    @staticmethod
+    async def verify_access_token(token: str) -> Dict[str, Any]:
+        """
+        Full check of an access token: signature, expiry, type and revocation.
+        Shared by the cookie-authenticated routes and token introspection.
+
+        Returns:
+            Dict[str, Any] - the claims under "data", or the reason under "error"
+        """
+        token_data = AuthService.validate_token(token)
+        if not token_data["success"]:
+            return token_data
+
+        claims = token_data["data"]
+        if claims.get("type") != "access":
+            return {"success": False, "error": "Invalid token type"}
+
+        # In-memory filter check; the database is only asked on a possible match
+        if await revocation_list.is_revoked(claims):
+            return {"success": False, "error": "Token has been revoked"}
+
+        return token_data
+
+    @staticmethod
+    async def introspect(tokens: List[str], compact: bool = False) -> Tuple[Dict[str, Any], int]:
+        """
+        Verify a batch of access tokens for a gateway, in request order.
+
+        Args:
+            tokens: List[str] - The tokens to check
+            compact: bool - Return only COMPACT_CLAIMS instead of every claim
+
+        Returns:
+            Tuple[Dict[str, Any], int] - active, remaining ttl (seconds) and claims per token
+        """
+        now = datetime.now(timezone.utc).timestamp()
+        # Gateways often send the same token more than once per batch
+        checked: Dict[str, Dict[str, Any]] = {}
+        results = []
+
+        for token in tokens:
+            result = checked.get(token)
+            if result is None:
+                token_data = await AuthService.verify_access_token(token)
+                if token_data["success"]:
+                    claims = token_data["data"]
+                    if compact:
+                        claims = {key: claims[key] for key in COMPACT_CLAIMS if key in claims}
+                    result = {"active": True, "ttl": max(0, int(claims["exp"] - now)), "claims": claims}
+                else:
+                    result = {"active": False, "error": token_data["error"]}
+                checked[token] = result
+            results.append(result)
+
+        return {
+            "success": True,
+            "data": results
+        }, 200
+
     @staticmethod
     def get_refresh_expiry() -> timedelta:
         """
@@ -75,18 +170,38 @@ class AuthService:
         return timedelta(days=settings.JWT_REFRESH_EXPIRY)
     
     @staticmethod
-    def refresh_token(refresh_token: str, db: Session) -> Tuple[dict, int]:
+    async def load_user(db_utils: AsyncDatabaseUtils, condition, primary: bool = False) -> Tuple[Dict[str, Any], int]:
+        """
+        Read the compact user record matching condition and cache it
+
+        Returns:
+            Tuple[Dict[str, Any], int] - data is a CachedUser, or None when no user matches
+        """
+        # Taken before the read: a write landing meanwhile makes put() skip this row
+        version = user_cache.version
+        stmt = select(*USER_RECORD_COLUMNS).where(condition).limit(1)
+        res, status = await db_utils.db_all(use_primary(stmt) if primary else stmt, model_name="User")
+        if not res["success"]:
+            return res, status
+
+        record = user_record(res["data"][0]) if res["data"] else None
+        if record is not None:
+            user_cache.put(record, version)
+        return {"success": True, "data": record}, 200
+
+    @staticmethod
+    async def refresh_token(refresh_token: str, db: AsyncSession | Session) -> Tuple[dict, int]:
         """
         Refresh a JWT token
 
         Args:
             refresh_token: str - The refresh token to refresh
-            db: Session - The database session
+            db: AsyncSession | Session - The database session
 
         Returns:
             Tuple[Dict[str, Any], int] - The new token data and status code
         """
-        db_utils = DatabaseUtils(db)
+        db_utils = AsyncDatabaseUtils(db)
 
         # Validate refresh token
         token_data = AuthService.validate_token(refresh_token)
@@ -112,86 +227,164 @@ class AuthService:
                 "error": "Invalid token"
             }, 401
 
-        # Get user from database
-        res, status = db_utils.db_get(User, user_id, model_name="User")
-        if not res["success"]:
-            return res, status
+        jti = token_data["data"].get("jti")
+        rotated = False
+        legacy_user = None
+        now = datetime.now(timezone.utc)
+        expires_dt = now + AuthService.get_refresh_expiry()
 
-        user = res["data"]
+        if jti:
+            # Hot path: one conditional UPDATE rotates this device's session (compare-and-swap)
+            new_jti = rotated_jti(jti)
+            res, status = await SessionService.rotate(
+                db, user_id, jti, expires_dt, grace_seconds=settings.REFRESH_GRACE_SECONDS
+            )
+            if not res["success"]:
+                return res, status
+
+            rotated = res["data"] > 0
+            if not rotated:
+                # Issued before per-device sessions: the digest lives on the user row
+                res, status = await AuthService.load_user(db_utils, User.refresh_digest == token_digest(jti))
+                if not res["success"]:
+                    return res, status
+
+                user = res["data"]
+                if user is not None and user.id == user_id and verify_token_digest(jti, user.refresh_digest):
+                    legacy_user = user
+        else:
+            # Legacy tokens without a jti were stored as bcrypt hashes. Credential state is read
+            # from the primary, never the user cache: another worker's cached copy can keep a
+            # hash that was rotated or logged out for up to USER_CACHE_TTL
+            res, status = await AuthService.load_user(db_utils, User.id == user_id, primary=True)
+            if not res["success"]:
+                return res, status
+            user = res["data"]
+
+            if user is not None and user.refresh_hash and await hasher.verify_token_hash(refresh_token, user.refresh_hash):
+                legacy_user = user
 
         # Check if refresh token is valid
-        if not getattr(user, "refresh_hash", None) or not verify_token_hash(refresh_token, user.refresh_hash):
+        if not rotated and legacy_user is None:
             return {
                 "success": False,
                 "error": "Invalid refresh token"
             }, 401
 
-        # Generate new token data
+        if legacy_user is not None:
+            # Move the legacy token onto a session row; both changes land in one commit.
+            # The WHERE holds the verified value, so of two refreshes racing on one token
+            # only the first clears it and the other gets a 401 instead of a second session
+            new_jti = new_raw_token()
+            res, status = await SessionService.clear_legacy(
+                db, user_id,
+                refresh_digest=token_digest(jti) if jti else None,
+                refresh_hash=None if jti else legacy_user.refresh_hash,
+                commit=False
+            )
+            if not res["success"]:
+                return res, status
+
+            if res["data"] == 0:
+                await db_utils.db_rollback()
+                return {
+                    "success": False,
+                    "error": "Invalid refresh token"
+                }, 401
+
+            commit_res, commit_status = await SessionService.create(db, user_id, new_jti, expires_dt)
+            if not commit_res["success"]:
+                return commit_res, commit_status
+
+        # Carry the identity claims over from the presented token
         new_token_data = {
-            "sub": str(user.id),
-            "email": user.email,
-            "username": user.username,
+            "sub": str(user_id),
+            "email": token_data["data"].get("email"),
+            "username": token_data["data"].get("username"),
         }
 
         # Generate new access token
-        access_token = AuthService.generate_token({**new_token_data, "type": "access"})
+        access_token = AuthService.generate_token({**new_token_data, "type": "access", "jti": new_raw_token()})
 
         # Generate new refresh token
-        refresh_claims = new_token_data.copy()
         new_refresh_token = AuthService.generate_token(
-            {**refresh_claims, "type": "refresh"},
+            {**new_token_data, "type": "refresh", "jti": new_jti},
             expires_delta=AuthService.get_refresh_expiry()
         )
 
-        # Update refresh hash
-        user.refresh_hash = hash_token(new_refresh_token)
-
-        # Commit changes to database
-        commit_res, commit_status = db_utils.db_commit()
-        if not commit_res["success"]:
-            return commit_res, commit_status
-        
         return {
             "success": True,
             "access_token": access_token,
             "refresh_token": new_refresh_token,
             "token_type": "bearer",
-            "expires_in": settings.JWT_EXPIRY_MINUTES * 60
+            "expires_in": settings.JWT_EXPIRY_MINUTES * 60,
+            # For the audit trail; the router drops it from the response body
+            "user_id": user_id
         }, 200
 
     @staticmethod
-    def login(
-            db: Session, 
+    async def login(
+            db: AsyncSession | Session, 
             credentials: LoginRequest,
+            device: str | None = None,
     )-> Tuple[Dict[str, Any], int]:
-        # Login by email or username
-        user = db.query(User).filter(
-            or_(User.email == credentials.identifier, User.username == credentials.identifier)
-        ).first()
+        db_utils = AsyncDatabaseUtils(db)
+
+        # Login by email or username; repeat logins skip the query
+        user = user_cache.get_by_identifier(credentials.identifier)
+        if user is None:
+            lookup = or_(User.email == credentials.identifier, User.username == credentials.identifier)
+            res, status = await AuthService.load_user(db_utils, lookup)
+            if not res["success"]:
+                return res, status
 
-        if not user or not verify_password(credentials.password, user.hashed_pw):
+            user = res["data"]
+            if user is None and HAS_REPLICAS:
+                # The replica may lag behind a signup made moments ago; the primary has the final word
+                res, status = await AuthService.load_user(db_utils, lookup, primary=True)
+                if not res["success"]:
+                    return res, status
+                user = res["data"]
+
+        if not user or not await hasher.verify_password(credentials.password, user.hashed_pw):
             return {
                 "success": False,
                 "error": "Invalid username/email or password"
             }, 401
-        
+
+        # Upgrade hashes made with an older cost; saved by the commit below
+        if hasher.needs_rehash(user.hashed_pw):
+            res, status = await db_utils.db_execute(
+                update(User)
+                .where(User.id == user.id)
+                .values(hashed_pw=await hasher.hash_password(credentials.password)),
+                model_name="User",
+                commit=False
+            )
+            if not res["success"]:
+                return res, status
+
         token_data = {
             "sub": str(user.id),
             "email": user.email,
             "username": user.username
         }
 
-        access_token = AuthService.generate_token({**token_data, "type": "access"})
+        access_token = AuthService.generate_token({**token_data, "type": "access", "jti": new_raw_token()})
+        refresh_jti = new_raw_token()
         refresh_token = AuthService.generate_token(
-            {**token_data, "type": "refresh"},
+            {**token_data, "type": "refresh", "jti": refresh_jti},
             expires_delta=AuthService.get_refresh_expiry()
         )
 
-        # Store hashed refresh tokens server-side
-        db_utils = DatabaseUtils(db)
-        hashed_refresh = hash_token(refresh_token)
-        user.refresh_hash = hashed_refresh
-        commit_res, status_code = db_utils.db_commit()
+        # One session row per device, keyed by a digest of the refresh token's jti
+        commit_res, status_code = await SessionService.create(
+            db,
+            user.id,
+            refresh_jti,
+            datetime.now(timezone.utc) + AuthService.get_refresh_expiry(),
+            device=device
+        )
 
         if not commit_res["success"]:
             return commit_res, status_code
@@ -211,18 +404,51 @@ class AuthService:
         }, 200
     
     @staticmethod
-    def logout(db: Session, user_id: int) -> Tuple[Dict[str, Any], int]:
-        db_utils = DatabaseUtils(db)
-        
-        res, status = db_utils.db_get(User, user_id, model_name="User")
+    async def logout(
+            db: AsyncSession | Session,
+            user_id: int,
+            refresh_token: str | None = None,
+            access_claims: Dict[str, Any] | None = None
+    ) -> Tuple[Dict[str, Any], int]:
+        """
+        End the session of the presented refresh token; other devices stay signed in.
+        The presented access token is revoked too, so it stops working before its exp.
+        """
+        if access_claims:
+            res, status = await revocation_list.revoke_token(db, access_claims)
+            if not res["success"]:
+                return res, status
+
+        token_data = AuthService.validate_token(refresh_token) if refresh_token else {"success": False}
+        claims = token_data.get("data", {}) if token_data["success"] else {}
+
+        if claims.get("type") == "refresh" and claims.get("sub") == str(user_id) and claims.get("jti"):
+            res, status = await SessionService.revoke(db, user_id, claims["jti"])
+            if not res["success"]:
+                return res, status
+            if res["data"]:
+                return {"success": True, "message": "Logged out successfully"}, 200
+
+        # No session row: the token predates sessions and is tracked on the user
+        res, status = await SessionService.clear_legacy(db, user_id)
         if not res["success"]:
             return res, status
-        
-        user = res["data"]
-        user.refresh_hash = None
-        
-        commit_res, commit_status = db_utils.db_commit()
-        if not commit_res["success"]:
-            return commit_res, commit_status
-        
-        return {"success": True, "message": "Logged out successfully"}, 200
\ No newline at end of file
+
+        return {"success": True, "message": "Logged out successfully"}, 200
+
+    @staticmethod
+    async def logout_all(db: AsyncSession | Session, user_id: int) -> Tuple[Dict[str, Any], int]:
+        # Access tokens already handed to other devices stop working as well
+        res, status = await revocation_list.revoke_user(db, user_id)
+        if not res["success"]:
+            return res, status
+
+        res, status = await SessionService.revoke_all(db, user_id)
+        if not res["success"]:
+            return res, status
+
+        return {
+            "success": True,
+            "message": "Logged out on all devices",
+            "data": {"sessions_revoked": res["data"]}
+        }, 200
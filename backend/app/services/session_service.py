@@ -0,0 +1,184 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Tuple
+from sqlalchemy import case, delete, insert, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import User, UserSession
+from core.database import session_scope, use_primary
+from core.db_utils import AsyncDatabaseUtils
+from core.security import rotated_jti, token_digest
+
+class SessionService:
+    """
+    Per-device refresh sessions: one user_sessions row per refresh token.
+    """
+
+    @staticmethod
+    async def create(
+            db: AsyncSession | Session,
+            user_id: int,
+            jti: str,
+            expires_dt: datetime,
+            device: str | None = None
+    ) -> Tuple[Dict[str, Any], int]:
+        """
+        Insert a session and commit, together with any pending changes on the session.
+        """
+        now = datetime.now(timezone.utc)
+        return await AsyncDatabaseUtils(db).db_insert(
+            insert(UserSession).values(
+                user_id=user_id,
+                refresh_digest=token_digest(jti),
+                device=device[:150] if device else None,
+                created_dt=now,
+                last_used_dt=now,
+                expires_dt=expires_dt,
+            ).returning(UserSession.id),
+            model_name="UserSession"
+        )
+
+    @staticmethod
+    async def rotate(
+            db: AsyncSession | Session,
+            user_id: int,
+            jti: str,
+            expires_dt: datetime,
+            grace_seconds: int = 0
+    ) -> Tuple[Dict[str, Any], int]:
+        """
+        Compare-and-swap the session of refresh token jti over to rotated_jti(jti)
+        in one UPDATE; data is the number of sessions rotated (0 or 1).
+
+        The successor is derived from jti, so a concurrent refresh of the same
+        token arriving within grace_seconds of the rotation matches the already
+        rotated row and gets the same new token instead of losing the race.
+        """
+        now = datetime.now(timezone.utc)
+        current = token_digest(jti)
+        successor = token_digest(rotated_jti(jti))
+
+        matches = UserSession.refresh_digest == current
+        if grace_seconds > 0:
+            matches = matches | (
+                (UserSession.refresh_digest == successor)
+                & (UserSession.rotated_dt > now - timedelta(seconds=grace_seconds))
+            )
+
+        stmt = (
+            update(UserSession)
+            .where(UserSession.user_id == user_id, UserSession.expires_dt > now, matches)
+            # rotated_dt first: MySQL applies SET left to right and the CASE must see the old digest;
+            # a grace-window retry keeps the original rotation time so the window never extends
+            .ordered_values(
+                (UserSession.rotated_dt, case((UserSession.refresh_digest == current, now), else_=UserSession.rotated_dt)),
+                (UserSession.refresh_digest, successor),
+                (UserSession.last_used_dt, now),
+                (UserSession.expires_dt, expires_dt),
+            )
+            # Nothing is loaded in the session, so skip the ORM's evaluate/fetch step
+            .execution_options(synchronize_session=False)
+        )
+        return await AsyncDatabaseUtils(db).db_execute(stmt, model_name="UserSession")
+
+    @staticmethod
+    async def revoke(db: AsyncSession | Session, user_id: int, jti: str) -> Tuple[Dict[str, Any], int]:
+        return await AsyncDatabaseUtils(db).db_execute(
+            delete(UserSession).where(
+                UserSession.refresh_digest == token_digest(jti),
+                UserSession.user_id == user_id
+            ),
+            model_name="UserSession"
+        )
+
+    @staticmethod
+    async def clear_legacy(
+            db: AsyncSession | Session,
+            user_id: int,
+            refresh_digest: str | None = None,
+            refresh_hash: str | None = None,
+            commit=True
+    ) -> Tuple[Dict[str, Any], int]:
+        """
+        Drop the single refresh token tracked on the user row before sessions existed.
+
+        Given the digest or bcrypt hash that was verified, this is a compare-and-swap:
+        data is 0 when a concurrent request already moved that token.
+        """
+        matches = User.refresh_digest.is_not(None) | User.refresh_hash.is_not(None)
+        if refresh_digest is not None:
+            matches = User.refresh_digest == refresh_digest
+        elif refresh_hash is not None:
+            matches = User.refresh_hash == refresh_hash
+
+        return await AsyncDatabaseUtils(db).db_execute(
+            update(User)
+            .where(User.id == user_id, matches)
+            .values(refresh_digest=None, refresh_hash=None),
+            model_name="User",
+            commit=commit
+        )
+
+    @staticmethod
+    async def revoke_all(db: AsyncSession | Session, user_id: int) -> Tuple[Dict[str, Any], int]:
+        """
+        Sign a user out everywhere: one delete on the user_id index.
+        """
+        res, status = await SessionService.clear_legacy(db, user_id, commit=False)
+        if not res["success"]:
+            return res, status
+
+        return await AsyncDatabaseUtils(db).db_execute(
+            delete(UserSession).where(UserSession.user_id == user_id),
+            model_name="UserSession"
+        )
+
+    @staticmethod
+    async def sweep_expired(batch_size: int) -> int:
+        """
+        Delete expired sessions in batches of batch_size, committing after each
+        so no single transaction holds the table for long.
+        """
+        removed = 0
+        async with session_scope() as db:
+            db_utils = AsyncDatabaseUtils(db)
+            while True:
+                # Ids first, then the delete: MySQL rejects LIMIT inside an IN subquery
+                res, _ = await db_utils.db_all(
+                    use_primary(
+                        select(UserSession.id)
+                        .where(UserSession.expires_dt <= datetime.now(timezone.utc))
+                        .limit(batch_size)
+                    ),
+                    model_name="UserSession"
+                )
+                if not res["success"] or not res["data"]:
+                    break
+
+                ids = [row.id for row in res["data"]]
+                res, _ = await db_utils.db_execute(
+                    delete(UserSession).where(UserSession.id.in_(ids)),
+                    model_name="UserSession"
+                )
+                if not res["success"]:
+                    break
+
+                removed += res["data"]
+                if len(ids) < batch_size:
+                    break
+                # Let requests in between batches
+                await asyncio.sleep(0)
+        return removed
+
+    @staticmethod
+    async def run_sweeper(interval: int, batch_size: int) -> None:
+        """
+        Background task started from the app lifespan; cancelled on shutdown.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await SessionService.sweep_expired(batch_size)
+            except Exception:
+                # A failed pass (e.g. database briefly down) is retried on the next tick
+                continue
@@ -1,44 +1,165 @@
 from models import User
 from schemas.user import UserCreate, UserCreateResponse
-from core.db_utils import DatabaseUtils
-from core.security import hash_password
+from core.database import IS_ASYNC, SessionLocal, session_scope, use_primary
+from core.db_utils import AsyncDatabaseUtils
+from core.hashing import hasher
+from sqlalchemy import insert, or_, select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, Iterator, List, Sequence
+
+# Public fields, in UserCreateResponse order
+USER_FIELDS = tuple(UserCreateResponse.model_fields)
 
 
 class UserService:
     @staticmethod
-    def create_user(db: Session, user_data: UserCreate):
-        # Pre-check for existing email and username
+    async def _conflict_errors(db_utils: AsyncDatabaseUtils, user_data: UserCreate, primary: bool = False):
+        """
+        One indexed lookup for users holding the email or username; data is the list of messages.
+        """
+        stmt = select(User.email, User.username).where(
+            or_(User.email == user_data.email, User.username == user_data.username)
+        )
+        res, status = await db_utils.db_all(use_primary(stmt) if primary else stmt, model_name="User")
+        if not res["success"]:
+            return res, status
+
         errors = []
-        existing_email = db.query(User).filter(User.email == user_data.email).first()
-        existing_username = db.query(User).filter(User.username == user_data.username).first()
 
-        if existing_email:
+        if user_data.email in {row.email for row in res["data"]}:
             errors.append("Email already registered")
 
-        if existing_username:
+        if user_data.username in {row.username for row in res["data"]}:
             errors.append("Username already taken")
 
-        if errors:
-            return {"success": False, "errors": errors}, 400
-        
-        db_utils = DatabaseUtils(db)
-        
-        # Creating an instance for the new user
-        new_user = User(
+        return {"success": True, "data": errors}, 200
+
+    @staticmethod
+    async def create_user(db: AsyncSession | Session, user_data: UserCreate):
+        db_utils = AsyncDatabaseUtils(db)
+
+        # Reject duplicates before any bcrypt work
+        res, status = await UserService._conflict_errors(db_utils, user_data)
+        if not res["success"]:
+            return res, status
+        if res["data"]:
+            return {"success": False, "errors": res["data"]}, 400
+
+        # Single INSERT ... RETURNING; the unique constraints settle any race
+        stmt = insert(User).values(
             username=user_data.username,
-            hashed_pw=hash_password(user_data.password),
+            hashed_pw=await hasher.hash_password(user_data.password),
             first_name=user_data.first_name,
             last_name=user_data.last_name,
             email=user_data.email,
             phone_num=user_data.phone_num,
+        ).returning(
+            User.id,
+            User.username,
+            User.first_name,
+            User.last_name,
+            User.email,
+            User.phone_num,
+            User.created_dt,
+            User.updated_dt,
         )
 
-        res, status = db_utils.db_create(new_user)
+        res, status = await db_utils.db_insert(stmt, model_name="User")
         if res.get("success"):
+            # RETURNING already selected exactly the UserCreateResponse fields; the
+            # route renders the row as-is (datetimes included) without re-validating it
             return {
                 "success": True,
-                "data": UserCreateResponse.model_validate(new_user).model_dump(mode="json"),
+                "data": res["data"],
             }, status
-        
-        return res, status
\ No newline at end of file
+
+        # Lost a race with a concurrent signup. The database reports only the first violated
+        # constraint (SQLite), so look again, on the primary, for the same messages as above
+        if status == 409:
+            res, status = await UserService._conflict_errors(db_utils, user_data, primary=True)
+            if not res["success"]:
+                return res, status
+            return {"success": False, "errors": res["data"] or ["User already exists"]}, 400
+
+        return res, status
+
+    @staticmethod
+    def _select_users(fields: Sequence[str], conditions: List):
+        columns = [getattr(User, name) for name in fields]
+        return select(*columns).where(*conditions).order_by(User.id)
+
+    @staticmethod
+    def _serialize(row) -> UserCreateResponse:
+        # Rows come from our own table, so skip re-validation; only the selected fields are set
+        return UserCreateResponse.model_construct(**row._mapping)
+
+    @staticmethod
+    async def list_users(
+            db: AsyncSession | Session,
+            after_id: int,
+            limit: int,
+            fields: Sequence[str],
+            conditions: List
+    ):
+        """
+        Keyset page: WHERE id > after_id ORDER BY id LIMIT n walks the primary key
+        index, so every page costs the same no matter how deep it is.
+        """
+        # The cursor needs the id even when the caller did not ask for it
+        columns = fields if "id" in fields else ("id", *fields)
+        stmt = UserService._select_users(columns, [User.id > after_id, *conditions]).limit(limit + 1)
+
+        res, status = await AsyncDatabaseUtils(db).db_all(stmt, model_name="User")
+        if not res["success"]:
+            return res, status
+
+        rows = res["data"]
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        include = set(fields)
+
+        return {
+            "success": True,
+            "data": [
+                UserService._serialize(row).model_dump(include=include)
+                for row in rows
+            ],
+            "next_cursor": rows[-1].id if has_more else None,
+        }, 200
+
+    @staticmethod
+    def export_ndjson(
+            fields: Sequence[str],
+            conditions: List,
+            batch_size: int = 1000
+    ) -> Iterator[str] | AsyncIterator[str]:
+        """
+        Stream matching users as NDJSON, one chunk per batch of batch_size rows.
+
+        Rows are fetched with yield_per (a server-side cursor where the driver has
+        one), so memory stays flat however many users are exported. The export
+        opens its own session because it outlives the request handler.
+        """
+        stmt = UserService._select_users(fields, conditions).execution_options(yield_per=batch_size)
+        include = set(fields)
+
+        def encode(partition) -> str:
+            return "".join(
+                UserService._serialize(row).model_dump_json(include=include) + "\n"
+                for row in partition
+            )
+
+        async def stream_async():
+            async with session_scope() as db:
+                result = await db.stream(stmt)
+                async for partition in result.partitions():
+                    yield encode(partition)
+
+        def stream_sync():
+            # Iterated in Starlette's threadpool, so blocking fetches are fine here
+            with SessionLocal() as db:
+                for partition in db.execute(stmt).partitions():
+                    yield encode(partition)
+
+        return stream_async() if IS_ASYNC else stream_sync()
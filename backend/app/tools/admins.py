@@ -0,0 +1,55 @@
+import argparse
+import json
+import sys
+from typing import List
+from sqlalchemy import create_engine, select, update
+from core.config import settings
+from core.database import sync_database_url
+from models import User
+
+"""
+Grant or revoke access to the admin routes (/users and its export).
+
+Admin rights are the users.is_admin column and are only ever changed here,
+with direct database access; the API has no way to set them. The column is
+added by the app's schema init (DB_INIT_MODE create or fingerprint), so
+start the app once on this version before granting the first admin.
+
+    python -m tools.admins grant alice
+    python -m tools.admins revoke alice
+    python -m tools.admins list
+"""
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Grant, revoke or list admin users")
+    parser.add_argument("action", choices=["grant", "revoke", "list"])
+    parser.add_argument("username", nargs="?")
+    parser.add_argument("--database-url", default=sync_database_url(settings.DATABASE_URL))
+    args = parser.parse_args(argv)
+
+    if args.action != "list" and not args.username:
+        parser.error(f"{args.action} needs a username")
+
+    engine = create_engine(args.database_url)
+    with engine.begin() as conn:
+        if args.action == "list":
+            rows = conn.execute(select(User.id, User.username).where(User.is_admin.is_(True)).order_by(User.id))
+            for row in rows:
+                print(json.dumps({"id": row.id, "username": row.username}))
+            return 0
+
+        # Revoking stores NULL, the value every user starts with
+        result = conn.execute(
+            update(User).where(User.username == args.username).values(is_admin=True if args.action == "grant" else None)
+        )
+        if result.rowcount == 0:
+            print(f"No user named {args.username!r}", file=sys.stderr)
+            return 1
+
+    print(json.dumps({"username": args.username, "is_admin": args.action == "grant"}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+import argparse
+import heapq
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List
+from core.breach import ALGORITHMS, DIGEST_SIZES, HEADER, MAGIC, VERSION
+
+"""
+Build the breached-password index read by core.breach.
+
+Reads the public Pwned Passwords dumps (`<hex hash>:<count>` per line, SHA-1
+or NTLM, ordered by hash or by prevalence) and writes the sorted, fixed-size
+hash prefixes with a small header. Memory use is bounded by --chunk-records:
+input is cut into sorted runs on disk that are then merged, and already
+sorted input (the "ordered by hash" dumps) is streamed through without a merge.
+
+An 8-byte prefix keeps the SHA-1 dump at about a third of its text size; with
+~10^9 hashes the chance of a random password matching a prefix is ~10^-10.
+
+    python -m tools.build_breach_index pwned-passwords-sha1-ordered-by-hash-v8.txt breached.bin
+"""
+
+READ_RECORDS = 65536
+
+
+def read_prefixes(path: Path, algorithm: str, prefix_bytes: int, min_count: int) -> Iterator[bytes]:
+    digits = DIGEST_SIZES[algorithm] * 2
+    with path.open("r", encoding="ascii") as f:
+        for number, line in enumerate(f, start=1):
+            digest, _, count = line.strip().partition(":")
+            if not digest:
+                continue
+            # A short or mixed-up line would become a prefix no password hashes to:
+            # stop instead of writing an index that silently lets breached passwords through
+            try:
+                if len(digest) != digits:
+                    raise ValueError
+                prefix = bytes.fromhex(digest[:prefix_bytes * 2])
+            except ValueError:
+                raise SystemExit(f"{path}:{number}: expected a {digits}-digit hex {algorithm} hash, got {digest[:64]!r}")
+            if count and int(count) < min_count:
+                continue
+            yield prefix
+
+
+def detect_algorithm(path: Path) -> str:
+    # 40 hex digits = SHA-1, 32 = NTLM
+    with path.open("r", encoding="ascii") as f:
+        digest = f.readline().strip().partition(":")[0]
+    for name, size in DIGEST_SIZES.items():
+        if len(digest) == size * 2:
+            return name
+    raise SystemExit(f"Cannot tell the hash type of {path}; pass --algorithm")
+
+
+def read_run(f: BinaryIO, size: int) -> Iterator[bytes]:
+    while block := f.read(size * READ_RECORDS):
+        for start in range(0, len(block), size):
+            yield block[start:start + size]
+
+
+def unique(records: Iterable[bytes]) -> Iterator[bytes]:
+    # Full hashes are unique, truncated prefixes may repeat
+    previous = None
+    for record in records:
+        if record != previous:
+            yield record
+            previous = record
+
+
+def write_runs(records: Iterator[bytes], chunk_records: int, workdir: Path) -> List[Path]:
+    """
+    Cut the input into sorted runs of at most chunk_records prefixes.
+    """
+    runs = []
+    while True:
+        chunk = [record for _, record in zip(range(chunk_records), records)]
+        if not chunk:
+            return runs
+        # Timsort is linear on input that is already in order
+        chunk.sort()
+        run = workdir / f"run-{len(runs):05d}"
+        with run.open("wb") as f:
+            f.write(b"".join(unique(chunk)))
+        runs.append(run)
+        print(f"run {len(runs)}: {len(chunk)} prefixes", file=sys.stderr)
+
+
+def first_last(run: Path, size: int) -> tuple[bytes, bytes]:
+    with run.open("rb") as f:
+        first = f.read(size)
+        f.seek(-size, os.SEEK_END)
+        return first, f.read(size)
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Build a breached-password index from Pwned Passwords dumps")
+    parser.add_argument("source", type=Path, help="Text dump with one `<hex hash>:<count>` per line")
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--algorithm", choices=sorted(ALGORITHMS), help="Defaults to the hash length of the first line")
+    parser.add_argument("--prefix-bytes", type=int, default=8, help="Bytes of each hash kept (4-20 for SHA-1, 4-16 for NTLM)")
+    parser.add_argument("--min-count", type=int, default=1, help="Skip hashes seen fewer times than this")
+    parser.add_argument("--chunk-records", type=int, default=10_000_000, help="Prefixes sorted in memory at once")
+    args = parser.parse_args(argv)
+
+    algorithm = args.algorithm or detect_algorithm(args.source)
+    size = args.prefix_bytes
+    if not 4 <= size <= DIGEST_SIZES[algorithm]:
+        parser.error(f"--prefix-bytes must be between 4 and {DIGEST_SIZES[algorithm]} for {algorithm}")
+
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(dir=args.output.parent) as workdir:
+        runs = write_runs(read_prefixes(args.source, algorithm, size, args.min_count), args.chunk_records, Path(workdir))
+
+        files = [run.open("rb") for run in runs]
+        try:
+            bounds = [first_last(run, size) for run in runs]
+            if all(bounds[i][1] <= bounds[i + 1][0] for i in range(len(bounds) - 1)):
+                # Runs already follow each other (input ordered by hash): concatenate
+                records = (record for f in files for record in read_run(f, size))
+            else:
+                records = heapq.merge(*(read_run(f, size) for f in files))
+
+            tmp = args.output.with_suffix(args.output.suffix + ".tmp")
+            count = 0
+            with tmp.open("wb") as out:
+                out.write(HEADER.pack(MAGIC, VERSION, ALGORITHMS[algorithm], size, 0))
+                batch = []
+                for record in unique(records):
+                    batch.append(record)
+                    if len(batch) == READ_RECORDS:
+                        out.write(b"".join(batch))
+                        count += len(batch)
+                        batch.clear()
+                out.write(b"".join(batch))
+                count += len(batch)
+                # The record count is only known at the end
+                out.seek(0)
+                out.write(HEADER.pack(MAGIC, VERSION, ALGORITHMS[algorithm], size, count))
+            os.replace(tmp, args.output)
+        finally:
+            for f in files:
+                f.close()
+
+    print(json.dumps({
+        "output": str(args.output),
+        "algorithm": algorithm,
+        "prefix_bytes": size,
+        "records": count,
+        "seconds": round(time.perf_counter() - started, 1),
+    }))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
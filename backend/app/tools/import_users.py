@@ -0,0 +1,215 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+from pydantic import ValidationError, field_validator, model_validator
+from sqlalchemy import create_engine, insert
+from sqlalchemy.exc import IntegrityError
+from core.config import settings
+from core.database import Base, sync_database_url
+from core.security import hash_password
+from models import User
+from schemas.user import UserCreate
+
+"""
+Bulk user import.
+
+Streams a CSV or JSONL file, validates each row against schemas.user.UserCreate,
+bcrypt-hashes passwords across worker processes and inserts users in batches.
+Progress is checkpointed after every committed batch so an interrupted run can
+resume where it stopped.
+
+Rows carry either a plain `password` or a `hashed_pw` produced by
+core.security.hash_password (e.g. an export from another AuthLogin instance);
+a `password` that is already such a bcrypt hash is not hashed again.
+
+    python -m tools.import_users users.csv --batch-size 1000 --workers 8
+"""
+
+BCRYPT_RE = re.compile(r"^\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}$")
+
+
+class ImportUser(UserCreate):
+    password: str | None = None
+    hashed_pw: str | None = None
+
+    @field_validator("password")
+    @classmethod
+    def validate_password(cls, v):
+        # Existing hashes skip the composition rules and are stored as-is
+        if v is None or BCRYPT_RE.match(v):
+            return v
+        return UserCreate.validate_password(v)
+
+    @model_validator(mode="after")
+    def require_credential(self):
+        if self.hashed_pw is None and self.password is not None and BCRYPT_RE.match(self.password):
+            self.hashed_pw, self.password = self.password, None
+
+        if self.hashed_pw is None and self.password is None:
+            raise ValueError("Row needs a password or hashed_pw")
+        if self.hashed_pw is not None and not BCRYPT_RE.match(self.hashed_pw):
+            raise ValueError("hashed_pw is not a bcrypt hash")
+        return self
+
+
+def read_rows(path: Path, fmt: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield raw rows one at a time so memory use does not depend on file size.
+    """
+    with path.open(newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                yield {key: value for key, value in row.items() if value not in (None, "")}
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def load_checkpoint(path: Path, source: Path) -> Dict[str, Any]:
+    if path.exists():
+        state = json.loads(path.read_text())
+        if state.get("source") == str(source.resolve()):
+            return state
+    return {"source": str(source.resolve()), "rows_done": 0, "inserted": 0, "rejected": 0}
+
+
+def save_checkpoint(path: Path, state: Dict[str, Any]) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, path)
+
+
+class Importer:
+    def __init__(self, engine, executor: ProcessPoolExecutor, workers: int, rejects) -> None:
+        self.engine = engine
+        self.executor = executor
+        self.workers = workers
+        self.rejects = rejects
+
+    def reject(self, line_no: int, reason: str, row: Dict[str, Any] | None = None) -> None:
+        # Never write credentials to the rejects file
+        record = {"row": line_no, "error": reason}
+        if row:
+            record.update({k: row.get(k) for k in ("username", "email")})
+        self.rejects.write(json.dumps(record) + "\n")
+
+    def prepare(self, batch: List[Tuple[int, Dict[str, Any]]]) -> Tuple[List[Tuple[int, Dict[str, Any]]], int]:
+        """
+        Validate a batch and hash the plain passwords in parallel.
+        """
+        valid, rejected = [], 0
+        for line_no, raw in batch:
+            try:
+                valid.append((line_no, ImportUser.model_validate(raw)))
+            except ValidationError as e:
+                rejected += 1
+                self.reject(line_no, "; ".join(err["msg"] for err in e.errors()), raw)
+
+        to_hash = [user.password for _, user in valid if user.hashed_pw is None]
+        chunksize = max(1, len(to_hash) // (self.workers * 4))
+        hashes = iter(self.executor.map(hash_password, to_hash, chunksize=chunksize))
+
+        rows = []
+        for line_no, user in valid:
+            rows.append((line_no, {
+                "username": user.username,
+                "hashed_pw": user.hashed_pw or next(hashes),
+                "first_name": user.first_name,
+                "last_name": user.last_name,
+                "email": user.email,
+                "phone_num": user.phone_num,
+            }))
+        return rows, rejected
+
+    def insert(self, rows: List[Tuple[int, Dict[str, Any]]]) -> Tuple[int, int]:
+        """
+        Insert a batch with one executemany; on a conflict, retry row by row to isolate duplicates.
+        """
+        if not rows:
+            return 0, 0
+
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(insert(User), [row for _, row in rows])
+            return len(rows), 0
+        except IntegrityError:
+            pass
+
+        inserted = rejected = 0
+        for line_no, row in rows:
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(insert(User), row)
+                inserted += 1
+            except IntegrityError:
+                rejected += 1
+                self.reject(line_no, "Email or username already exists", row)
+        return inserted, rejected
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import users from CSV or JSONL")
+    parser.add_argument("source", type=Path)
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--checkpoint", type=Path, help="Defaults to <source>.checkpoint")
+    parser.add_argument("--rejects", type=Path, help="Defaults to <source>.rejects.jsonl")
+    parser.add_argument("--database-url", default=sync_database_url(settings.DATABASE_URL))
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("csv" if args.source.suffix.lower() == ".csv" else "jsonl")
+    checkpoint = args.checkpoint or args.source.with_name(args.source.name + ".checkpoint")
+    rejects_path = args.rejects or args.source.with_name(args.source.name + ".rejects.jsonl")
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(bind=engine)
+
+    state = load_checkpoint(checkpoint, args.source)
+    if state["rows_done"]:
+        print(f"Resuming after row {state['rows_done']}", file=sys.stderr)
+
+    rows = enumerate(read_rows(args.source, fmt), start=1)
+    # Skip rows committed by a previous run without validating or hashing them
+    rows = islice(rows, state["rows_done"], None)
+
+    started = time.perf_counter()
+    processed = 0
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")) as executor, \
+            rejects_path.open("a", encoding="utf-8") as rejects:
+        importer = Importer(engine, executor, args.workers, rejects)
+
+        while batch := list(islice(rows, args.batch_size)):
+            prepared, invalid = importer.prepare(batch)
+            inserted, duplicates = importer.insert(prepared)
+            rejects.flush()
+
+            state["rows_done"] = batch[-1][0]
+            state["inserted"] += inserted
+            state["rejected"] += invalid + duplicates
+            save_checkpoint(checkpoint, state)
+
+            processed += len(batch)
+            rate = processed / (time.perf_counter() - started)
+            print(
+                f"rows={state['rows_done']} inserted={state['inserted']} "
+                f"rejected={state['rejected']} rate={rate:.0f}/s",
+                file=sys.stderr
+            )
+
+    print(json.dumps(state))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())